@@ -6,62 +6,579 @@ A Streamlit interface for generating ATS-optimized resumes from job descriptions
 import os
 import re
 import time
+import hashlib
+import datetime
+import logging
+import threading
+import concurrent.futures
+import functools
+import copy
+import pathlib
 import streamlit as st
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-from resume_builder import create_resume_pdf
-from main import get_base_resume, parse_job_description, tailor_resume, extract_text_from_pdf, extract_base_resume_info
 import json
+import msgpack
 
-# Load environment variables
-load_dotenv()
+# google.generativeai, reportlab (via resume_builder) and main are imported lazily
+# inside the functions that need them, so the first render doesn't pay for them.
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
 
+@st.cache_resource
+def get_model():
+    """Configure Gemini and build the model on first use."""
+    import google.generativeai as genai
 
-def extract_company_name(jd_text: str, jd_analysis: dict) -> str:
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel("gemini-2.5-flash")
+
+
+@st.cache_resource
+def warm_gemini_connection():
     """
-    Extract company name from the job description using Gemini.
-    Returns a clean folder-safe name.
+    Open the Gemini connection (DNS + TLS + gRPC channel) in a background thread, once per process,
+    so the first real request doesn't pay the handshake. The SDK reuses that channel for later calls.
+    count_tokens is used because it's free and doesn't count against the generation quota.
     """
-    prompt = f"""
-Extract ONLY the company name from this job description. Return just the company name, nothing else.
-If you can't find a company name, return "Unknown_Company".
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-Job Description:
-{jd_text[:2000]}
+    ctx = get_script_run_ctx()
 
-Company name:"""
-    
-    # Retry logic for rate limits
+    def _warm():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            get_model().count_tokens("ping")
+        except Exception as e:
+            print(f"⚠️ Gemini warm-up failed: {e}")
+
+    threading.Thread(target=_warm, daemon=True).start()
+
+
+class RateLimiter:
+    """
+    Token bucket that paces requests proactively instead of waiting for a 429.
+    Allows `rate` requests per `per` seconds; use as a context manager around each call.
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) * self.per / self.rate)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+@st.cache_resource
+def get_gemini_limiter() -> RateLimiter:
+    """Single limiter shared across reruns and sessions (Gemini Flash free tier: 10 req/min)."""
+    return RateLimiter(rate=10, per=60.0)
+
+
+@st.cache_resource
+def get_pdf_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Worker pool for ReportLab rendering, shared across reruns and sessions."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf")
+
+
+# On-disk cache of analyze_and_tailor results, keyed by (JD, base resume) hash
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+# Structured output for the fused analyze + tailor call.
+# Skills are returned as a list of {category, skills} because the schema can't express free-form keys.
+_BULLETS = {"type": "array", "items": {"type": "string"}}
+ANALYZE_AND_TAILOR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "job_title": {"type": "string"},
+        "location": {"type": "string"},
+        "mandatory_keywords": {"type": "array", "items": {"type": "string"}},
+        "company_name": {"type": "string"},
+        "tailored_resume": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "contact": {
+                    "type": "object",
+                    "properties": {
+                        "location": {"type": "string"},
+                        "phone": {"type": "string"},
+                        "email": {"type": "string"},
+                        "linkedin_url": {"type": "string"},
+                        "portfolio_url": {"type": "string"},
+                    },
+                },
+                "summary": {"type": "string"},
+                "education": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "institution": {"type": "string"},
+                            "degree": {"type": "string"},
+                            "gpa": {"type": "string"},
+                            "dates": {"type": "string"},
+                            "location": {"type": "string"},
+                        },
+                    },
+                },
+                "skills": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "category": {"type": "string"},
+                            "skills": {"type": "string"},
+                        },
+                    },
+                },
+                "experience": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "company": {"type": "string"},
+                            "title": {"type": "string"},
+                            "dates": {"type": "string"},
+                            "location": {"type": "string"},
+                            "bullets": _BULLETS,
+                        },
+                    },
+                },
+                "projects": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string"},
+                            "dates": {"type": "string"},
+                            "bullets": _BULLETS,
+                        },
+                    },
+                },
+                "leadership": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "organization": {"type": "string"},
+                            "title": {"type": "string"},
+                            "dates": {"type": "string"},
+                            "location": {"type": "string"},
+                            "bullets": _BULLETS,
+                        },
+                    },
+                },
+            },
+            "required": ["name", "contact", "summary", "skills", "experience"],
+        },
+    },
+    "required": ["job_title", "location", "mandatory_keywords", "company_name", "tailored_resume"],
+}
+
+
+@functools.lru_cache(maxsize=1)
+def get_analyze_and_tailor_instructions() -> str:
+    """
+    Static instructions for analyze_and_tailor. Only the JD changes between requests,
+    so these plus the base resume are registered once as Gemini cached content.
+    """
+    from main import get_tailoring_rules
+
+    return f"""
+You are a Strategic Resume Architect. Your PRIMARY GOAL is to achieve a 95+ ATS (Applicant Tracking System) match score.
+
+Do the following in ONE response:
+Step 1: Analyze the JOB DESCRIPTION and extract the job_title, the primary location (City, State only),
+        the mandatory_keywords (required technical skills) and the precise company_name of the hiring company
+        (use "Unknown_Company" only if it truly cannot be found).
+Step 2: Using your Step 1 analysis, rewrite the CURRENT RESUME DATA into tailored_resume following the rules below.
+        Return skills as a list of {{"category": ..., "skills": "comma, separated, skills"}} objects.
+
+CRITICAL OBJECTIVE: Rewrite the resume to MAXIMIZE ATS keyword matching while maintaining authenticity.
+
+{get_tailoring_rules("the location extracted in Step 1", "industry of the job description")}Return a single JSON object with the keys job_title, location, mandatory_keywords, company_name and tailored_resume."""
+
+GEMINI_CACHE_TTL = datetime.timedelta(hours=1)
+GEMINI_CACHE_MODEL = "models/gemini-2.5-flash"
+
+# Batch mode calls get_cached_model from several threads at once; without this each one
+# could miss and create (and pay for) its own CachedContent for the same resume
+_GEMINI_CACHE_LOCK = threading.Lock()
+
+
+def get_cached_model(base_resume: dict):
+    """
+    Returns a model bound to a Gemini CachedContent holding the static instructions + base resume.
+    The cache is created once per session and lazily re-created when it expires or the resume changes.
+    Returns None if context caching is unavailable (e.g. the prefix is below the minimum cacheable size);
+    that failure is remembered for the same model and resume, so later runs skip the failing API call.
+    """
+    resume_json = json.dumps(base_resume, indent=2)
+    resume_hash = hashlib.sha256(resume_json.encode("utf-8")).hexdigest()
+    cache_key = (GEMINI_CACHE_MODEL, resume_hash)
+
+    with _GEMINI_CACHE_LOCK:
+        cache = st.session_state.get("gemini_cache")
+        if cache and cache["key"] == cache_key and time.time() < cache["expires_at"]:
+            return cache["model"]  # None if creation failed for this model + resume
+
+        try:
+            import google.generativeai as genai
+            from google.generativeai import caching
+
+            get_model()  # Ensures genai is configured with the API key
+            cached_content = caching.CachedContent.create(
+                model=GEMINI_CACHE_MODEL,
+                system_instruction=get_analyze_and_tailor_instructions(),
+                contents=[f"CURRENT RESUME DATA:\n{resume_json}"],
+                ttl=GEMINI_CACHE_TTL,
+            )
+            cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+        except Exception as e:
+            print(f"⚠️ Gemini context caching unavailable, sending full prompt: {e}")
+            # Don't retry on every generation; try again once a cache would have expired anyway
+            st.session_state["gemini_cache"] = {
+                "model": None,
+                "key": cache_key,
+                "expires_at": time.time() + GEMINI_CACHE_TTL.total_seconds(),
+            }
+            return None
+
+        st.session_state["gemini_cache"] = {
+            "model": cached_model,
+            "key": cache_key,
+            # Refresh slightly before the server-side TTL runs out
+            "expires_at": time.time() + GEMINI_CACHE_TTL.total_seconds() - 60,
+        }
+        return cached_model
+
+
+class TailoringFallback(Exception):
+    """
+    Raised by analyze_and_tailor when the response had no usable tailored resume.
+    result holds the base-resume fallback; raising keeps it out of st.cache_data and the disk cache.
+    """
+
+    def __init__(self, result: dict):
+        super().__init__("Gemini did not return a usable tailored resume, using the base resume")
+        self.result = result
+
+
+def analyze_and_tailor(jd_text: str, base_resume: dict) -> dict:
+    """
+    Analyze the job description, extract the company name and tailor the resume
+    in a single Gemini call.
+    Returns a dict with job_title, location, mandatory_keywords, company_name and tailored_resume.
+    Raises TailoringFallback (carrying the untailored result) if tailoring failed.
+    """
+    cached_model = get_cached_model(base_resume)
+    if cached_model is not None:
+        # Instructions and base resume already live in the cache; send only the JD
+        llm = cached_model
+        prompt = f"JOB DESCRIPTION:\n{jd_text}"
+    else:
+        llm = get_model()
+        prompt = f"""{get_analyze_and_tailor_instructions()}
+
+CURRENT RESUME DATA:
+{json.dumps(base_resume, indent=2)}
+
+JOB DESCRIPTION:
+{jd_text}"""
+
+    # Requests are paced by the rate limiter; retry only as a safety net for 429s
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = model.generate_content(prompt)
-            company = response.text.strip()
-            
-            # Clean the company name to be folder-safe
-            company = re.sub(r'[<>:"/\\|?*]', '', company)  # Remove invalid chars
-            company = company.replace(' ', '_')  # Replace spaces with underscores
-            company = company[:50]  # Limit length
-            
-            if not company:
-                company = "Unknown_Company"
-                
-            return company
+            with get_gemini_limiter():
+                response = llm.generate_content(
+                    prompt,
+                    generation_config={
+                        "response_mime_type": "application/json",
+                        "response_schema": ANALYZE_AND_TAILOR_SCHEMA,
+                    },
+                )
+            break
         except Exception as e:
             if "429" in str(e) and attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 10  # 10s, 20s, 30s
+                wait_time = 2 ** attempt  # 1s, 2s
                 st.warning(f"⏳ Rate limited. Waiting {wait_time}s before retry...")
                 time.sleep(wait_time)
             else:
-                st.warning(f"Could not extract company name: {e}")
-                return "Unknown_Company"
-    
-    return "Unknown_Company"
+                raise
+
+    from main import _extract_first_json, _validate_tailored, _attach_static_fields, _untailored_resume, clean_tailored_resume
+
+    # Same parsing and validation as main.analyze_and_tailor
+    result = _extract_first_json(response.text)
+    if result is None:
+        raise ValueError("Gemini did not return valid JSON")
+
+    tailored = result.get('tailored_resume')
+    if isinstance(tailored, dict) and isinstance(tailored.get('skills'), list):
+        tailored['skills'] = {s.get('category', ''): s.get('skills', '') for s in tailored['skills'] if isinstance(s, dict) and s.get('category')}
+
+    tailored, errors = _validate_tailored(tailored)
+    if tailored is not None:
+        # Name, contact and education come from the profile, with the location from the JD
+        result['tailored_resume'] = clean_tailored_resume(_attach_static_fields(tailored, base_resume, result))
+        return result
+
+    if errors:
+        print(f"⚠️ Tailored resume failed validation: {errors}")
+    # Same fallback as main: base resume with just the location updated
+    result['tailored_resume'] = _untailored_resume(base_resume, result)
+    raise TailoringFallback(result)
+
+
+@st.cache_data(show_spinner=False)
+def load_profile(path: str, mtime: float) -> dict:
+    """
+    Load the profile once per file version.
+    mtime is part of the cache key, so editing or re-uploading the profile invalidates it.
+    Reads the binary msgpack snapshot when it is at least as new as the JSON, else parses the JSON.
+    """
+    snapshot_path = _profile_snapshot_path(path)
+    try:
+        if os.path.getmtime(snapshot_path) >= mtime:
+            with open(snapshot_path, "rb") as f:
+                return msgpack.unpackb(f.read())
+    except (OSError, ValueError, msgpack.UnpackException):
+        pass  # Missing or stale snapshot, fall back to JSON
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_profile(path: str, profile_data: dict):
+    """Write the profile JSON (source of truth) plus a msgpack snapshot for fast reloads."""
+    with open(path, "w") as f:
+        json.dump(profile_data, f, indent=4)
+    with open(_profile_snapshot_path(path), "wb") as f:
+        f.write(msgpack.packb(profile_data))
+
+
+def _profile_snapshot_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".msgpack"
+
+
+# Boilerplate that carries no signal for tailoring (links, EEO/legal footers)
+_JD_BOILERPLATE = [
+    re.compile(r'https?://\S+'),
+    re.compile(r'(?im)^[^\n]*\b(?:equal (?:employment )?opportunity|affirmative action|reasonable accommodation|e-verify)\b[^\n]*$'),
+]
+_BLANK_LINES = re.compile(r'\n\s*\n(?:\s*\n)+')
+
+
+@st.cache_data(show_spinner=False)
+def _count_tokens(text: str) -> int:
+    return get_model().count_tokens(text).total_tokens
+
+
+def _trim_jd(jd_text: str, max_tokens: int = 2000) -> str:
+    """
+    Strip boilerplate and repeated lines from the JD, then truncate it to roughly max_tokens.
+    Tokens are only counted via the API when the text is long enough to possibly exceed the budget.
+    """
+    text = jd_text
+    for pattern in _JD_BOILERPLATE:
+        text = pattern.sub('', text)
+
+    # Scraped postings often repeat lines (nav, headers); keep the first occurrence
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        key = line.strip().lower()
+        if key and key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    text = _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+    # ~4 chars per token, so anything this short is safely under budget
+    if len(text) <= max_tokens * 3:
+        return text
+
+    try:
+        total_tokens = _count_tokens(text)
+    except Exception:
+        total_tokens = len(text) // 4
+
+    if total_tokens > max_tokens:
+        text = text[:int(len(text) * max_tokens / total_tokens)]
+    return text
+
+
+def _set_profile_mode(mode: str):
+    """Button callback: runs before the rerun, so the new mode renders without an extra st.rerun()."""
+    st.session_state["profile_mode"] = mode
+
+
+def get_cache_key(jd_text: str, base_resume: dict) -> str:
+    """Content hash of the whitespace/case-normalized JD plus the base resume."""
+    normalized_jd = re.sub(r'\s+', ' ', jd_text).strip().lower()
+    payload = normalized_jd + json.dumps(base_resume, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _cached_pipeline(jd_hash: str, _jd_text: str, _base_resume: dict) -> dict:
+    """
+    Run analyze_and_tailor once per (JD, base resume) hash.
+    Results are persisted to CACHE_DIR so repeat JDs skip all LLM calls, even across restarts.
+    """
+    cache_path = os.path.join(CACHE_DIR, f"{jd_hash}.json")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass  # Corrupt entry, regenerate below
+
+    result = analyze_and_tailor(_jd_text, _base_resume)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(result, f)
+    except OSError as e:
+        st.warning(f"Could not write cache: {e}")
+
+    return result
+
+
+def run_pipeline(jd_text: str, base_resume: dict) -> dict:
+    """_cached_pipeline for this JD; an untailored fallback is returned but never cached."""
+    try:
+        return _cached_pipeline(get_cache_key(jd_text, base_resume), jd_text, base_resume)
+    except TailoringFallback as e:
+        print(f"⚠️ {e}")
+        return e.result
+
+
+# Runs of invalid path characters and whitespace, replaced by a single underscore
+_SAFE = re.compile(r'[<>:"/\\|?*\s]+')
+
+# Heuristics for pulling the company name out of the JD text, most specific first
+_COMPANY_PATTERNS = [
+    re.compile(r'\bCompany(?:\s+Name)?\s*:\s*([A-Z][\w&.\-]*(?:\s+[A-Z][\w&.\-]*){0,3})'),
+    re.compile(r'\bAbout\s+Us\s*:?\s+([A-Z][\w&.\-]*(?:\s+[A-Z][\w&.\-]*){0,3})\s+(?:is|are|was|builds|helps)\b'),
+    re.compile(r'\bAbout\s+([A-Z][\w&.\-]*(?:\s+[A-Z][\w&.\-]*){0,3})'),
+    re.compile(r'\b(?:at|[Jj]oin)\s+([A-Z][\w&.\-]*(?:\s+[A-Z][\w&.\-]*){0,3})'),
+]
+# Capitalized words that follow "About"/"at"/"Join" but are not company names
+_NOT_COMPANY = {"us", "the", "this", "you", "your", "our", "we", "role", "job", "position", "team", "a", "an"}
+
+
+@st.cache_data(show_spinner=False)
+def _regex_company(jd_text: str) -> str:
+    """Deterministic company-name lookup. Returns '' if no pattern matches."""
+    for pattern in _COMPANY_PATTERNS:
+        for match in pattern.finditer(jd_text):
+            candidate = match.group(1).strip(" .-")
+            if candidate and candidate.split()[0].lower() not in _NOT_COMPANY:
+                return candidate
+    return ""
+
+
+def extract_company_name(jd_text: str, jd_analysis: dict) -> str:
+    """
+    Get the company name from the job analysis, falling back to a regex pass over the JD.
+    Returns a clean folder-safe name.
+    """
+    company = (jd_analysis.get('company') or jd_analysis.get('company_name') or '').strip()
+    if not company or company == "Unknown_Company":
+        company = _regex_company(jd_text)
+
+    # Clean the company name to be folder-safe in one pass, limiting length
+    return _SAFE.sub('_', company).strip('_')[:50] or "Unknown_Company"
+
+
+# In batch mode, JDs are separated by a line containing only ---
+_JD_SEPARATOR = re.compile(r'^\s*-{3,}\s*$', re.M)
+
+
+def run_batch(jd_texts: list, base_resume: dict, output_dir: str, max_concurrency: int = 10) -> list:
+    """
+    Generate one tailored resume per JD, running up to max_concurrency JDs at once.
+    Each JD goes through the same disk cache as single mode; Gemini calls are still paced by the rate limiter.
+    Returns (company_name, output_path, error) tuples in input order.
+    """
+    from resume_builder import create_resume_pdf
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+
+    def generate_one(jd_text):
+        # Give the worker the script context so st.cache_data / st.session_state work
+        add_script_run_ctx(threading.current_thread(), ctx)
+        company_name = "Unknown_Company"
+        try:
+            jd_trimmed = _trim_jd(jd_text)
+            result = run_pipeline(jd_trimmed, copy.deepcopy(base_resume))
+            company_name = extract_company_name(jd_text, result)
+
+            # Company/Job_Title/ so several roles at one company don't overwrite each other
+            job_dir = _SAFE.sub('_', result.get('job_title') or 'Job').strip('_')[:50] or 'Job'
+            company_dir = os.path.join(output_dir, company_name, job_dir)
+            os.makedirs(company_dir, exist_ok=True)
+
+            safe_name = base_resume.get('name', 'User').replace(" ", "_")
+            output_path = os.path.join(company_dir, f"{safe_name}_Resume.pdf")
+            create_resume_pdf(result['tailored_resume'], output_path)
+            return company_name, output_path, None
+        except Exception as e:
+            return company_name, None, str(e)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_concurrency, len(jd_texts))) as pool:
+        return list(pool.map(generate_one, jd_texts))
+
+
+# Static CSS + page header, sent to the browser in a single markdown element
+_HEADER_HTML = """
+<style>
+.main-header {
+    font-size: 2.5rem;
+    font-weight: bold;
+    text-align: center;
+    padding: 1rem;
+    background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+}
+.success-box {
+    padding: 1rem;
+    border-radius: 0.5rem;
+    background-color: #d4edda;
+    border: 1px solid #c3e6cb;
+    color: #155724;
+}
+.stTextArea textarea {
+    font-size: 14px;
+}
+</style>
+<h1 class="main-header">📄 Resume Generator</h1>
+<p><b>Generate ATS-optimized resumes tailored to any job description</b></p>
+<hr/>
+"""
 
 
 def main():
@@ -71,34 +588,14 @@ def main():
         layout="wide"
     )
     
-    # Custom CSS for better styling
-    st.markdown("""
-    <style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        text-align: center;
-        padding: 1rem;
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    .success-box {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        background-color: #d4edda;
-        border: 1px solid #c3e6cb;
-        color: #155724;
-    }
-    .stTextArea textarea {
-        font-size: 14px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    # main.py logs its progress; show it in the terminal like before (no-op after the first run)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
-    st.markdown('<h1 class="main-header">📄 Resume Generator</h1>', unsafe_allow_html=True)
-    st.markdown("**Generate ATS-optimized resumes tailored to any job description**")
-    st.markdown("---")
+    # Custom CSS + header
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     
     # Check for API key
     if not os.getenv("GEMINI_API_KEY"):
@@ -106,17 +603,32 @@ def main():
         st.code("GEMINI_API_KEY=your_api_key_here", language="bash")
         return
     
+    # Connect to Gemini while the user is still pasting the JD
+    warm_gemini_connection()
+    
     # Two-column layout
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.subheader("📝 Paste Job Description")
-        jd_text = st.text_area(
-            "Job Description",
-            height=400,
-            placeholder="Paste the full job description here...\n\nInclude:\n- Job title\n- Company name\n- Location\n- Requirements\n- Responsibilities",
-            label_visibility="collapsed"
-        )
+        single_tab, batch_tab = st.tabs(["Single", "Batch"])
+        
+        with single_tab:
+            jd_text = st.text_area(
+                "Job Description",
+                height=400,
+                placeholder="Paste the full job description here...\n\nInclude:\n- Job title\n- Company name\n- Location\n- Requirements\n- Responsibilities",
+                label_visibility="collapsed"
+            )
+        
+        with batch_tab:
+            batch_text = st.text_area(
+                "Job Descriptions",
+                height=400,
+                placeholder="Paste several job descriptions, separated by a line containing only ---",
+                label_visibility="collapsed"
+            )
+            batch_clicked = st.button("🚀 Generate All", use_container_width=True)
     
     with col2:
         st.subheader("⚙️ Settings")
@@ -133,37 +645,48 @@ def main():
         # Profile Management
         profile_path = "user_profile.json"
         
-        if os.path.exists(profile_path):
+        # "view" shows the saved profile, "upload" shows the uploader.
+        # Switching modes only touches session state; the saved profile is kept until a new one replaces it.
+        if not os.path.exists(profile_path):
+            st.session_state["profile_mode"] = "upload"
+        elif "profile_mode" not in st.session_state:
+            st.session_state["profile_mode"] = "view"
+        
+        if st.session_state["profile_mode"] == "view":
             try:
-                with open(profile_path, "r") as f:
-                    profile_data = json.load(f)
+                profile_data = load_profile(profile_path, os.path.getmtime(profile_path))
                 
                 st.success(f"✅ Loaded Profile: **{profile_data.get('name', 'Unknown')}**")
                 
                 with st.expander("View Profile Details"):
                     st.json(profile_data)
                     
-                if st.button("🔄 Update Profile (Upload New Resume)"):
-                    os.remove(profile_path)
-                    st.rerun()
+                st.button("🔄 Update Profile (Upload New Resume)", on_click=_set_profile_mode, args=("upload",))
                     
             except Exception as e:
                 st.error(f"Error loading profile: {e}")
                 os.remove(profile_path)
                 st.rerun()
         else:
-            st.warning("⚠️ No profile found. Please upload your base resume.")
+            if os.path.exists(profile_path):
+                st.info("Upload a new resume to replace your current profile.")
+                st.button("✖️ Cancel", on_click=_set_profile_mode, args=("view",))
+            else:
+                st.warning("⚠️ No profile found. Please upload your base resume.")
             uploaded_file = st.file_uploader("Upload Base Resume (PDF)", type=["pdf"])
             
             if uploaded_file is not None:
                 with st.spinner("📄 Extracting resume details..."):
                     try:
+                        from main import extract_text_from_pdf, extract_base_resume_info
+
                         text = extract_text_from_pdf(uploaded_file)
                         if text:
                             profile_data = extract_base_resume_info(text)
                             if profile_data.get("name"):
-                                with open(profile_path, "w") as f:
-                                    json.dump(profile_data, f, indent=4)
+                                # Overwrites the previous profile only now that the new one is valid
+                                save_profile(profile_path, profile_data)
+                                st.session_state["profile_mode"] = "view"
                                 st.success("🎉 Profile created successfully!")
                                 st.rerun()
                             else:
@@ -179,8 +702,7 @@ def main():
                 st.stop()
         
         # Load profile (guaranteed to exist here)
-        with open(profile_path, "r") as f:
-            base_resume = json.load(f)
+        base_resume = load_profile(profile_path, os.path.getmtime(profile_path))
 
         st.markdown(f"""
         **Name:** {base_resume.get('name', 'N/A')}  
@@ -191,16 +713,50 @@ def main():
     
     st.markdown("---")
     
+    # Batch mode
+    if batch_clicked:
+        jd_texts = [jd.strip() for jd in _JD_SEPARATOR.split(batch_text) if jd.strip()]
+        if not jd_texts:
+            st.error("Please paste at least one job description!")
+            return
+        
+        with st.spinner(f"✨ Tailoring {len(jd_texts)} resumes..."):
+            results = run_batch(jd_texts, base_resume, output_dir)
+        
+        succeeded = sum(1 for _, _, error in results if not error)
+        st.success(f"🎉 Generated {succeeded}/{len(results)} resumes")
+        for company_name, output_path, error in results:
+            if error:
+                st.error(f"**{company_name}**: {error}")
+            else:
+                st.markdown(f"- **{company_name}:** `{os.path.abspath(output_path)}`")
+        return
+    
     # Generate button
     if st.button("🚀 Generate Tailored Resume", type="primary", use_container_width=True):
-        if not jd_text.strip():
+        # Strip once; everything downstream uses the cleaned text
+        jd_clean = jd_text.strip()
+        if not jd_clean:
             st.error("Please paste a job description first!")
-            return
+            st.stop()
         
-        with st.spinner("🔍 Analyzing job description..."):
+        with st.spinner("🔍 Analyzing job description and tailoring resume..."):
             try:
-                # Parse JD
-                jd_analysis = parse_job_description(jd_text)
+                # Parse JD, extract company and tailor in one call
+                # (base_resume is the cached profile loaded above)
+                jd_trimmed = _trim_jd(jd_clean)
+                try:
+                    result = _cached_pipeline(get_cache_key(jd_trimmed, base_resume), jd_trimmed, base_resume)
+                except TailoringFallback as fallback:
+                    st.warning(f"⚠️ {fallback}")
+                    result = fallback.result
+                tailored_resume = result['tailored_resume']
+                jd_analysis = {
+                    'job_title': result.get('job_title', 'N/A'),
+                    'location': result.get('location', 'N/A'),
+                    'mandatory_keywords': result.get('mandatory_keywords', []),
+                    'company_name': result.get('company_name', 'Unknown_Company'),
+                }
                 
                 st.success(f"✅ Found: **{jd_analysis.get('job_title', 'N/A')}** at **{jd_analysis.get('location', 'N/A')}**")
                 
@@ -210,43 +766,33 @@ def main():
                     st.info(f"🔑 Keywords: {', '.join(keywords[:10])}")
                 
             except Exception as e:
-                st.error(f"Error parsing JD: {e}")
+                st.error(f"Error analyzing JD: {e}")
                 return
         
-        with st.spinner("✨ Tailoring resume for ATS optimization..."):
-            try:
-                # Get base resume and tailor it
-                base_resume = get_base_resume()
-                tailored_resume = tailor_resume(base_resume, jd_analysis)
-            except Exception as e:
-                st.error(f"Error tailoring resume: {e}")
-                return
+        company_name = extract_company_name(jd_clean, jd_analysis)
+        safe_name = base_resume.get('name', 'User').replace(" ", "_")
+        out = pathlib.Path(output_dir) / company_name / f"{safe_name}_Resume.pdf"
         
-        with st.spinner("📁 Extracting company name and creating folder..."):
+        with st.status("📄 Generating PDF...") as status:
             try:
-                # Extract company name
-                company_name = extract_company_name(jd_text, jd_analysis)
-                
-                # Create company folder
-                company_dir = os.path.join(output_dir, company_name)
-                os.makedirs(company_dir, exist_ok=True)
-                
-                # Set output path
-                safe_name = base_resume.get('name', 'User').replace(" ", "_")
-                output_path = os.path.join(company_dir, f"{safe_name}_Resume.pdf")
+                from resume_builder import create_resume_pdf
+
+                # Create the company folder only once we're about to write into it
+                out.parent.mkdir(parents=True, exist_ok=True)
                 
+                # Render off the script thread so the UI stays responsive
+                future = get_pdf_pool().submit(create_resume_pdf, tailored_resume, str(out))
+                while not future.done():
+                    time.sleep(0.1)
+                future.result()  # Re-raises any rendering error
+                status.update(label="📄 PDF generated", state="complete")
             except Exception as e:
-                st.error(f"Error creating folder: {e}")
-                return
-        
-        with st.spinner("📄 Generating PDF..."):
-            try:
-                # Generate PDF
-                create_resume_pdf(tailored_resume, output_path)
-            except Exception as e:
+                status.update(label="📄 PDF generation failed", state="error")
                 st.error(f"Error generating PDF: {e}")
                 return
         
+        abs_out = out.resolve()
+        
         # Success message
         st.markdown("---")
         st.success("🎉 Resume generated successfully!")
@@ -254,15 +800,15 @@ def main():
         st.markdown(f"""
         ### 📂 Output Details
         - **Company:** {company_name}
-        - **Location:** `{os.path.abspath(output_path)}`
+        - **Location:** `{abs_out}`
         - **Job Title:** {jd_analysis.get('job_title', 'N/A')}
         """)
         
         # Show the file path for easy access
-        st.code(os.path.abspath(output_path), language="bash")
+        st.code(str(abs_out), language="bash")
         
         # Offer to open folder
-        st.markdown(f"📁 [Open folder in Finder](file://{os.path.abspath(company_dir)})")
+        st.markdown(f"📁 [Open folder in Finder](file://{abs_out.parent})")
         
         # Show what was tailored
         with st.expander("🔍 See tailoring details"):
@@ -6,32 +6,160 @@ Tailors a resume based on a Job Description using Google Gemini API.
 import os
 import json
 import re
+import copy
 from dotenv import load_dotenv
-import google.generativeai as genai
-from resume_builder import create_resume_pdf
 import io
-import pypdf
+import atexit
+import functools
+import hashlib
 import requests
-from pydantic import BaseModel, Field
-from typing import List
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_right
+from itertools import accumulate, islice
+import sys
+import logging
+import threading
+import random
+import time
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from typing import Dict, List, Union
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
+# Library code logs instead of printing, so a server can route it off the request path;
+# the CLI below sends it to the terminal
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_gemini_model(model_name: str = "gemini-2.5-flash"):
+    """
+    Configure Gemini and build the model on first use.
+    The SDK (gRPC, protobuf, auth) is imported here so Ollama/OpenRouter/Groq runs never load it.
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(model_name)
 
 
 # Model provider options
-PROVIDERS = ["gemini", "ollama", "openrouter", "groq"]
+PROVIDERS = ["gemini", "ollama", "openrouter", "groq", "fastest"]
+
+# Pooled HTTP session so keep-alive connections (and TLS sessions) are reused across provider calls
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Shared httpx.AsyncClient per event loop (an AsyncClient can't be reused across loops)
+_ASYNC_CLIENTS = {}
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Returns the pooled HTTP/2 AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=True, limits=httpx.Limits(max_keepalive_connections=10))
+        _ASYNC_CLIENTS[loop] = client
+    return client
+
+
+async def _close_async_client():
+    """Close the running loop's AsyncClient; call before the loop shuts down."""
+    client = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _close_sessions():
+    _SESSION.close()
+    _ASYNC_CLIENTS.clear()
+
+
+atexit.register(_close_sessions)
+
+
+def warm_up_providers():
+    """
+    Pay provider start-up costs before the first request: import/configure the Gemini SDK
+    and open pooled keep-alive connections (DNS + TCP + TLS) to the HTTP providers.
+    Best effort; failures only mean the first real call does the work instead.
+    """
+    if os.getenv("GEMINI_API_KEY"):
+        try:
+            _get_gemini_model()
+        except Exception as e:
+            logger.warning(f"   ⚠️ Gemini warm-up failed: {e}")
+    warm_urls = ["http://localhost:11434/"]
+    if os.getenv("OPENROUTER_API_KEY"):
+        warm_urls.append("https://openrouter.ai/api/v1/models")
+    for url in warm_urls:
+        try:
+            _SESSION.head(url, timeout=3)
+        except requests.RequestException:
+            pass  # Provider not reachable (e.g. Ollama not running)
+
+# Transient failures worth retrying; kept to a few attempts with jitter so retries don't pile up
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 3
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """Seconds to wait before the next attempt: the server's Retry-After if given, else backoff + jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), 30.0)
+    return min(2 ** attempt, 4) + random.random()
+
+
+def _post_with_retry(url: str, label: str, **kwargs) -> requests.Response:
+    """_SESSION.post, retried on 429/5xx and timeouts. Returns the last response; raises the last error."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = _SESSION.post(url, **kwargs)
+        except requests.Timeout as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"   ⚠️ {label} timed out ({e}), retrying in {delay:.1f}s...")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                return response
+            delay = _retry_delay(attempt, response)
+            logger.warning(f"   ⚠️ {label} returned {response.status_code}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+
+async def _apost_with_retry(url: str, label: str, **kwargs) -> httpx.Response:
+    """Async version of _post_with_retry, using the pooled AsyncClient."""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            response = await _get_async_client().post(url, **kwargs)
+        except httpx.TimeoutException as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"   ⚠️ {label} timed out ({e}), retrying in {delay:.1f}s...")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                return response
+            delay = _retry_delay(attempt, response)
+            logger.warning(f"   ⚠️ {label} returned {response.status_code}, retrying in {delay:.1f}s...")
+        await asyncio.sleep(delay)
 
 
 def query_ollama(prompt: str, model_name: str = "llama3.1:8b") -> str:
     """Query local Ollama instance."""
     try:
-        response = requests.post(
+        response = _post_with_retry(
             "http://localhost:11434/api/generate",
+            "Ollama",
             json={
                 "model": model_name,
                 "prompt": prompt,
@@ -42,10 +170,10 @@ def query_ollama(prompt: str, model_name: str = "llama3.1:8b") -> str:
         if response.status_code == 200:
             return response.json().get('response', '')
         else:
-            print(f"⚠️ Ollama Error: {response.status_code} - {response.text}")
+            logger.warning(f"⚠️ Ollama Error: {response.status_code} - {response.text}")
             return ""
     except Exception as e:
-        print(f"⚠️ Ollama Connection Error: {e}")
+        logger.warning(f"⚠️ Ollama Connection Error: {e}")
         return ""
 
 
@@ -53,12 +181,13 @@ def query_openrouter(prompt: str, model_name: str = "arcee-ai/trinity-large-prev
     """Query OpenRouter API."""
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
-        print("⚠️ OPENROUTER_API_KEY not found in environment.")
+        logger.warning("⚠️ OPENROUTER_API_KEY not found in environment.")
         return ""
     
     try:
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
+        response = _post_with_retry(
+            "https://openrouter.ai/api/v1/chat/completions",
+            "OpenRouter",
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
@@ -80,10 +209,10 @@ def query_openrouter(prompt: str, model_name: str = "arcee-ai/trinity-large-prev
             data = response.json()
             return data.get('choices', [{}])[0].get('message', {}).get('content', '')
         else:
-            print(f"⚠️ OpenRouter Error: {response.status_code} - {response.text}")
+            logger.warning(f"⚠️ OpenRouter Error: {response.status_code} - {response.text}")
             return ""
     except Exception as e:
-        print(f"⚠️ OpenRouter Connection Error: {e}")
+        logger.warning(f"⚠️ OpenRouter Connection Error: {e}")
         return ""
 
 def query_groq(prompt: str, expect_json: bool = False) -> str:
@@ -93,7 +222,7 @@ def query_groq(prompt: str, expect_json: bool = False) -> str:
     """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
-        print("⚠️ GROQ_API_KEY not found in environment.")
+        logger.warning("⚠️ GROQ_API_KEY not found in environment.")
         return ""
         
     models_chain = [
@@ -104,7 +233,7 @@ def query_groq(prompt: str, expect_json: bool = False) -> str:
 
     for model_id in models_chain:
         try:
-            print(f"   ⚡ Groq: Attempting with {model_id}...")
+            logger.info(f"   ⚡ Groq: Attempting with {model_id}...")
             
             payload = {
                 "model": model_id,
@@ -117,7 +246,7 @@ def query_groq(prompt: str, expect_json: bool = False) -> str:
             if expect_json:
                 payload["response_format"] = {"type": "json_object"}
             
-            response = requests.post(
+            response = _SESSION.post(
                 url="https://api.groq.com/openai/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {api_key}",
@@ -132,14 +261,14 @@ def query_groq(prompt: str, expect_json: bool = False) -> str:
                 return data.get('choices', [{}])[0].get('message', {}).get('content', '')
             
             elif response.status_code == 429:
-                print(f"   ⚠️ Groq Rate Limit ({model_id}): Switching to fallback...")
+                logger.warning(f"   ⚠️ Groq Rate Limit ({model_id}): Switching to fallback...")
                 continue # Try next model
             elif response.status_code == 400 and expect_json:
                  # Some models might not support json_object type or require "json" in prompt (which we usually have)
-                 print(f"   ⚠️ Groq JSON Mode Error ({model_id}): Retrying without force-json...")
+                 logger.warning(f"   ⚠️ Groq JSON Mode Error ({model_id}): Retrying without force-json...")
                  payload.pop("response_format", None)
                  # Retry without forced json mode
-                 retry_resp = requests.post(
+                 retry_resp = _SESSION.post(
                     url="https://api.groq.com/openai/v1/chat/completions",
                     headers={"Authorization": f"Bearer {api_key}","Content-Type": "application/json"},
                     json=payload, timeout=60
@@ -149,72 +278,328 @@ def query_groq(prompt: str, expect_json: bool = False) -> str:
                  else:
                      continue
             else:
-                print(f"   ⚠️ Groq Error ({model_id}): {response.status_code} - {response.text}")
+                logger.warning(f"   ⚠️ Groq Error ({model_id}): {response.status_code} - {response.text}")
                 continue # Try next model
                 
         except Exception as e:
-            print(f"   ⚠️ Groq Connection Error ({model_id}): {e}")
+            logger.warning(f"   ⚠️ Groq Connection Error ({model_id}): {e}")
             continue
             
     return "" # All failed
 
+def query_gemini(prompt: str, expect_json: bool = False) -> str:
+    """Query Gemini, falling back to Gemma and then Groq on errors."""
+    logger.info("   Using Gemini (Cloud)...")
+    try:
+        # Check if we should use the Pro model for analysis
+        if "ATS scoring" in prompt or "Analyze this resume" in prompt:
+             analysis_model = _get_gemini_model("gemini-3-pro-preview")
+             # Force JSON output
+             response = analysis_model.generate_content(
+                 prompt, 
+                 generation_config={"response_mime_type": "application/json"}
+             )
+        elif expect_json:
+             response = _get_gemini_model().generate_content(
+                 prompt,
+                 generation_config={"response_mime_type": "application/json"}
+             )
+        else:
+             response = _get_gemini_model().generate_content(prompt)
+             
+        return response.text
+    except Exception as e:
+        # Fallback mechanism
+        logger.warning(f"   ⚠️ Gemini Error: {e}")
+        
+        # If Gemini 3 fails, try Groq
+        if "gemini-3" in str(e).lower() or "not found" in str(e).lower() or "404" in str(e) or "400" in str(e) or "429" in str(e) or "quota" in str(e).lower():
+             logger.info("   🔄 Switching to Groq for analysis (JSON Mode)...")
+             return query_groq(prompt, expect_json=True)
+
+        error_msg = str(e).lower()
+        if "429" in error_msg or "resource exhausted" in error_msg or "quota" in error_msg or "500" in error_msg or "internal" in error_msg:
+            logger.info("   🔄 Switching to Fallback Config: Gemma 3 27B Instruct...")
+            try:
+                fallback_model = _get_gemini_model("gemma-3-27b-it")
+                if expect_json:
+                    response = fallback_model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+                else:
+                    response = fallback_model.generate_content(prompt)
+                return response.text
+            except Exception as fallback_e:
+                logger.warning(f"   ❌ Fallback Failed: {fallback_e}")
+                # Try Groq as last resort
+                logger.info("   🔄 Switching to Groq...")
+                return query_groq(prompt, expect_json=expect_json)
+        else:
+            # Try Groq before giving up
+            return query_groq(prompt, expect_json=expect_json)
+
+
+def _query_ollama(prompt: str, expect_json: bool = False) -> str:
+    logger.info("   Using Ollama (Local)...")
+    return query_ollama(prompt)
+
+
+def _query_openrouter(prompt: str, expect_json: bool = False) -> str:
+    logger.info("   Using OpenRouter (Cloud)...")
+    return query_openrouter(prompt)
+
+
+def _query_fastest(prompt: str, expect_json: bool = False) -> str:
+    logger.info(f"   Racing {' vs '.join(FANOUT_PROVIDERS)}...")
+    return query_first(prompt, FANOUT_PROVIDERS, expect_json)
+
+
+# Provider name -> query function(prompt, expect_json); unknown names fall back to Gemini
+_PROVIDERS = {
+    "gemini": query_gemini,
+    "ollama": _query_ollama,
+    "openrouter": _query_openrouter,
+    "groq": query_groq,
+    "fastest": _query_fastest,
+}
+
+
 def query_provider(prompt: str, provider: str = "gemini", expect_json: bool = False) -> str:
     """Query the specified AI provider."""
+    return _PROVIDERS.get(provider, query_gemini)(prompt, expect_json)
+
+
+def stream_provider(prompt: str, provider: str = "gemini"):
+    """
+    Yield the response text chunk by chunk as the provider produces it.
+    Gemini and Ollama stream natively; other providers yield their full response once.
+    """
+    if provider == "ollama":
+        try:
+            with _SESSION.post(
+                "http://localhost:11434/api/generate",
+                json={"model": "llama3.1:8b", "prompt": prompt, "stream": True},
+                stream=True,
+                timeout=300
+            ) as response:
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ Ollama Error: {response.status_code} - {response.text}")
+                    return
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if line:
+                        chunk = json.loads(line).get('response', '')
+                        if chunk:
+                            yield chunk
+        except Exception as e:
+            logger.warning(f"⚠️ Ollama Connection Error: {e}")
+    elif provider == "gemini":
+        started = False
+        try:
+            for chunk in _get_gemini_model().generate_content(prompt, stream=True):
+                started = True
+                yield chunk.text
+        except Exception as e:
+            logger.warning(f"   ⚠️ Gemini Error: {e}")
+            # Nothing sent yet, so the caller can still get a complete answer from Groq
+            if not started:
+                logger.info("   🔄 Switching to Groq...")
+                yield query_groq(prompt)
+    else:
+        yield query_provider(prompt, provider)
+
+
+async def aquery_ollama(prompt: str, model_name: str = "llama3.1:8b") -> str:
+    """Async version of query_ollama."""
+    try:
+        response = await _apost_with_retry(
+            "http://localhost:11434/api/generate",
+            "Ollama",
+            json={
+                "model": model_name,
+                "prompt": prompt,
+                "stream": False
+            },
+            timeout=300  # 5 minute timeout for reasoning models like deepseek-r1
+        )
+        if response.status_code == 200:
+            return response.json().get('response', '')
+        else:
+            logger.warning(f"⚠️ Ollama Error: {response.status_code} - {response.text}")
+            return ""
+    except Exception as e:
+        logger.warning(f"⚠️ Ollama Connection Error: {e}")
+        return ""
+
+
+async def aquery_openrouter(prompt: str, model_name: str = "arcee-ai/trinity-large-preview:free") -> str:
+    """Async version of query_openrouter."""
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        logger.warning("⚠️ OPENROUTER_API_KEY not found in environment.")
+        return ""
+    
+    try:
+        response = await _apost_with_retry(
+            "https://openrouter.ai/api/v1/chat/completions",
+            "OpenRouter",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://resume-generator.local",
+                "X-Title": "Resume Generator",
+            },
+            json={
+                "model": model_name,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            },
+            timeout=300
+        )
+        if response.status_code == 200:
+            data = response.json()
+            return data.get('choices', [{}])[0].get('message', {}).get('content', '')
+        else:
+            logger.warning(f"⚠️ OpenRouter Error: {response.status_code} - {response.text}")
+            return ""
+    except Exception as e:
+        logger.warning(f"⚠️ OpenRouter Connection Error: {e}")
+        return ""
+
+
+async def aquery_gemini(prompt: str, expect_json: bool = False) -> str:
+    """
+    Async Gemini query. The SDK call is blocking, so it runs in a worker thread
+    (keeping the full Gemma/Groq fallback chain of query_gemini).
+    """
+    return await asyncio.to_thread(query_gemini, prompt, expect_json)
+
+
+# Hedging: if a cloud call hasn't answered after HEDGE_DELAY seconds (roughly its P95),
+# fire one duplicate and take whichever finishes first. Prompts have no side effects.
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "8"))
+MAX_HEDGES_IN_FLIGHT = 4  # caps extra load when the provider is slow for everyone
+# Thread-safe: hedged() runs on event loops in several threads (Flask requests, batch runs)
+_HEDGE_SLOTS = threading.BoundedSemaphore(MAX_HEDGES_IN_FLIGHT)
+
+
+async def hedged(coro_factory, delay: float = HEDGE_DELAY) -> str:
+    """
+    Run coro_factory() and, if it is still pending after `delay` seconds, start a
+    second copy. Returns the first non-empty result and cancels the other call.
+    At most one backup per call, so load never exceeds 2x.
+    """
+    first = asyncio.create_task(coro_factory())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+    except asyncio.CancelledError:
+        # asyncio.wait doesn't cancel what it waits on; don't leave the call running
+        first.cancel()
+        raise
+    # Non-blocking: with every hedge slot taken, just keep waiting on the original call
+    if done or not _HEDGE_SLOTS.acquire(blocking=False):
+        return await first
+
+    logger.info(f"   ⏱️ No response after {delay:.0f}s, sending a hedged request...")
+    pending = {first, asyncio.create_task(coro_factory())}
+    result = ""
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # An empty string means that call failed; keep waiting on the other one
+            result = next((t.result() for t in done if t.result()), "")
+            if result:
+                break
+        return result
+    finally:
+        # Note: a cancelled Gemini call stops waiting but its worker thread runs to completion
+        for task in pending:
+            task.cancel()
+        _HEDGE_SLOTS.release()
+
+
+async def aquery_provider(prompt: str, provider: str = "gemini", expect_json: bool = False) -> str:
+    """Async version of query_provider. Cloud providers are hedged against slow responses."""
     if provider == "ollama":
-        print("   Using Ollama (Local)...")
-        return query_ollama(prompt)
+        logger.info("   Using Ollama (Local)...")
+        return await aquery_ollama(prompt)
     elif provider == "openrouter":
-        print("   Using OpenRouter (Cloud)...")
-        return query_openrouter(prompt)
+        logger.info("   Using OpenRouter (Cloud)...")
+        return await hedged(lambda: aquery_openrouter(prompt))
     elif provider == "groq":
-        return query_groq(prompt, expect_json=expect_json)
+        return await asyncio.to_thread(query_groq, prompt, expect_json)
+    elif provider == "fastest":
+        logger.info(f"   Racing {' vs '.join(FANOUT_PROVIDERS)}...")
+        return await aquery_first(prompt, FANOUT_PROVIDERS, expect_json)
     else:  # Default to gemini
-        print("   Using Gemini (Cloud)...")
-        # Use specific model if requested, otherwise default to flash
-        model_name = "gemini-2.5-flash"
-        if "gemini-3" in prompt.lower() or "analyze" in prompt.lower():
-             pass
+        return await hedged(lambda: aquery_gemini(prompt, expect_json))
+
+
+# Providers raced by the "fastest" provider: first usable answer wins, the rest are cancelled
+FANOUT_PROVIDERS = ("gemini", "openrouter")
+
 
+async def aquery_first(prompt: str, providers=FANOUT_PROVIDERS, expect_json: bool = False) -> str:
+    """
+    Send the prompt to every provider at once and return the first non-empty response.
+    A provider that errors or returns nothing just drops out of the race.
+    """
+    tasks = {asyncio.create_task(aquery_provider(prompt, p, expect_json)): p for p in providers}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result():
+                    logger.info(f"   🏁 {tasks[task]} answered first")
+                    return task.result()
+        return ""
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def query_first(prompt: str, providers=FANOUT_PROVIDERS, expect_json: bool = False) -> str:
+    """Blocking version of aquery_first for sync callers (CLI, Flask)."""
+    async def race():
         try:
-            # Check if we should use the Pro model for analysis
-            if "ATS scoring" in prompt or "Analyze this resume" in prompt:
-                 analysis_model = genai.GenerativeModel("gemini-3-pro-preview")
-                 # Force JSON output
-                 response = analysis_model.generate_content(
-                     prompt, 
-                     generation_config={"response_mime_type": "application/json"}
-                 )
-            else:
-                 response = model.generate_content(prompt)
-                 
-            return response.text
-        except Exception as e:
-            # Fallback mechanism
-            print(f"   ⚠️ Gemini Error: {e}")
-            
-            # If Gemini 3 fails, try Groq
-            if "gemini-3" in str(e).lower() or "not found" in str(e).lower() or "404" in str(e) or "400" in str(e) or "429" in str(e) or "quota" in str(e).lower():
-                 print("   🔄 Switching to Groq for analysis (JSON Mode)...")
-                 return query_groq(prompt, expect_json=True)
-
-            error_msg = str(e).lower()
-            if "429" in error_msg or "resource exhausted" in error_msg or "quota" in error_msg or "500" in error_msg or "internal" in error_msg:
-                print("   🔄 Switching to Fallback Config: Gemma 3 27B Instruct...")
-                try:
-                    fallback_model = genai.GenerativeModel("gemma-3-27b-it")
-                    if expect_json:
-                        response = fallback_model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-                    else:
-                        response = fallback_model.generate_content(prompt)
-                    return response.text
-                except Exception as fallback_e:
-                    print(f"   ❌ Fallback Failed: {fallback_e}")
-                    # Try Groq as last resort
-                    print("   🔄 Switching to Groq...")
-                    return query_groq(prompt, expect_json=expect_json)
-            else:
-                # Try Groq before giving up
-                return query_groq(prompt, expect_json=expect_json)
+            return await aquery_first(prompt, providers, expect_json)
+        finally:
+            await _close_async_client()
+    
+    # Not asyncio.run: it would wait for a losing Gemini call's worker thread to finish
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(race())
+    finally:
+        loop.close()
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_first_json(text: str):
+    """
+    Parse the first complete JSON object in an LLM response (ignoring prose or code fences around it).
+    Decodes in place with raw_decode instead of regex-matching the text and parsing it again.
+    Returns None if no object can be decoded.
+    """
+    i = text.find("{")
+    while i >= 0:
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(text, i)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError as e:
+            # A real object that broke part-way (e.g. truncated): don't fall through to a nested one
+            if '"' in text[i:e.pos]:
+                return None
+        # A stray brace before the real object; try the next one
+        i = text.find("{", i + 1)
+    return None
 
 
 def analyze_resume_with_jd(resume_data: dict, jd_text: str) -> dict:
@@ -222,6 +607,12 @@ def analyze_resume_with_jd(resume_data: dict, jd_text: str) -> dict:
     Analyze the resume against the JD using Gemini 3 Pro Preview (or Groq fallback).
     Returns a dict with score and feedback.
     """
+    cache_key = get_cache_key("ats_analysis", json.dumps(resume_data, sort_keys=True), normalize_jd(jd_text))
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached resume analysis")
+        return cached
+    
     prompt = f"""
     Analyze this resume against the job description and provide a strict ATS analysis.
     
@@ -249,10 +640,10 @@ def analyze_resume_with_jd(resume_data: dict, jd_text: str) -> dict:
     
     try:
         # We explicitly want to use the high-end model for this
-        print("   🧠 Analyzing with Gemini 3 Pro Preview...")
+        logger.info("   🧠 Analyzing with Gemini 3 Pro Preview...")
         
         response_text = query_provider(prompt, provider="gemini")
-        print(f"DEBUG: Raw Analysis Response: {response_text}")
+        logger.debug(f"Raw analysis response: {response_text}")
         
         # internal helper to clean json
         def clean_json_string(s):
@@ -269,23 +660,26 @@ def analyze_resume_with_jd(resume_data: dict, jd_text: str) -> dict:
         cleaned_text = clean_json_string(response_text)
         
         try:
-            return json.loads(cleaned_text)
+            analysis = json.loads(cleaned_text)
+            cache_set(cache_key, analysis)
+            return analysis
         except json.JSONDecodeError:
              # Last ditch effort: fix trailing commas or common issues?
              # For now, just return error
-             print("   ❌ JSON Decode Error on cleaned text")
+             logger.warning("   ❌ JSON Decode Error on cleaned text")
              pass
 
         return {"error": "Could not parse analysis results. See server logs for raw output."}
             
     except Exception as e:
-        print(f"Error in analysis: {e}")
+        logger.warning(f"Error in analysis: {e}")
         return {"error": str(e)}
 
 
 def extract_text_from_pdf(file_stream) -> str:
     """Extract text from a PDF file stream."""
     try:
+        import pypdf
         reader = pypdf.PdfReader(file_stream)
         text = ""
         for page in reader.pages:
@@ -301,7 +695,7 @@ def extract_text_from_pdf(file_stream) -> str:
         
         return text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.warning(f"Error extracting text from PDF: {e}")
         return ""
 
 
@@ -375,11 +769,11 @@ def extract_base_resume_info(resume_text: str) -> dict:
     
     try:
         response_text = query_provider(prompt, provider="gemini")
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            return json.loads(json_match.group())
+        profile_data = _extract_first_json(response_text)
+        if profile_data is not None:
+            return profile_data
     except Exception as e:
-        print(f"Error extracting resume info: {e}")
+        logger.warning(f"Error extracting resume info: {e}")
     
     return {} # Return empty if failure
 
@@ -414,8 +808,8 @@ def trim_projects_further(resume_data: dict, target_reduction: int, min_bullets:
         return resume_data
     
     projects = resume_data['projects']
-    # Store original bullets for potential restoration
-    original_bullets = {i: proj.get('bullets', [])[:] for i, proj in enumerate(projects)}
+    # Bullets removed in Phase 1, per project (for potential restoration); nothing is copied up front
+    trimmed_bullets = {}
     reduction_achieved = 0
     
     # Phase 1: Trim bullets from last project first (down to min_bullets)
@@ -427,7 +821,8 @@ def trim_projects_further(resume_data: dict, target_reduction: int, min_bullets:
         bullets = proj.get('bullets', [])
         
         while len(bullets) > min_bullets and reduction_achieved < target_reduction:
-            bullets.pop()  # Remove last (least important) bullet
+            # Remove last (least important) bullet
+            trimmed_bullets.setdefault(i, []).append(bullets.pop())
             reduction_achieved += 14  # Approximate height per bullet
         
         proj['bullets'] = bullets
@@ -440,7 +835,7 @@ def trim_projects_further(resume_data: dict, target_reduction: int, min_bullets:
         saved = 13 + len(removed.get('bullets', [])) * 14 + 2
         reduction_achieved += saved
         removed_project = True
-        print(f"      Removed project: {removed.get('name', 'Unknown')}")
+        logger.info(f"      Removed project: {removed.get('name', 'Unknown')}")
     
     # Phase 3: If we removed a project, try to add bullets back to remaining projects
     if removed_project and reduction_achieved > target_reduction:
@@ -451,14 +846,14 @@ def trim_projects_further(resume_data: dict, target_reduction: int, min_bullets:
         for i, proj in enumerate(projects):
             if bullets_can_add <= 0:
                 break
-            original = original_bullets.get(i, [])
+            trimmed = trimmed_bullets.get(i, [])
             current = proj.get('bullets', [])
             
             # Add back bullets that were trimmed (if any)
-            while len(current) < len(original) and bullets_can_add > 0:
-                # Find next bullet to restore
+            while trimmed and bullets_can_add > 0:
+                # Next bullet to restore is the last one popped
                 if len(current) < 3:  # Max 3 bullets per project
-                    current.append(original[len(current)])
+                    current.append(trimmed.pop())
                     bullets_can_add -= 1
                 else:
                     break
@@ -514,16 +909,11 @@ def trim_skills_to_fit(resume_data: dict, max_lines: int = 5) -> dict:
         if available_chars <= 0:
             continue
             
-        trimmed_list = []
-        current_len = 0
-        
-        for skill in skill_list:
-            skill_len = len(skill) + 2 # ", "
-            if current_len + skill_len <= available_chars:
-                trimmed_list.append(skill)
-                current_len += skill_len
-            else:
-                break
+        # Running length of the first k skills (each + 2 for ", "); keep the longest prefix that fits
+        cum_lens = list(accumulate(len(s) + 2 for s in skill_list))
+        k = bisect_right(cum_lens, available_chars)
+        trimmed_list = skill_list[:k]
+        current_len = cum_lens[k - 1] if k else 0
         
         if trimmed_list:
             final_skills[category] = ', '.join(trimmed_list)
@@ -537,19 +927,120 @@ def trim_skills_to_fit(resume_data: dict, max_lines: int = 5) -> dict:
     return resume_data
 
 
+# On-disk cache of LLM results (JD analysis, tailored resume, answers, ATS analysis), one JSON file per key
+RESPONSE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.resume_cache')
+
+# In-memory L1 in front of the disk cache: key -> serialized JSON, least recently used evicted first.
+# Values are stored serialized so callers mutating a returned dict can't corrupt the cached copy.
+MEMORY_CACHE_SIZE = 256
+_MEMORY_CACHE = OrderedDict()
+_MEMORY_CACHE_LOCK = threading.Lock()  # Flask serves requests from several threads
+
+
+def normalize_jd(jd_text: str) -> str:
+    """Lowercase and collapse whitespace so trivially re-formatted JDs share a cache entry."""
+    return re.sub(r'\s+', ' ', jd_text.lower().strip())
+
+
+def get_cache_key(*parts: str) -> str:
+    """sha256 over the given parts."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def _memory_cache_put(key: str, text: str):
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE[key] = text
+        _MEMORY_CACHE.move_to_end(key)
+        if len(_MEMORY_CACHE) > MEMORY_CACHE_SIZE:
+            _MEMORY_CACHE.popitem(last=False)
+
+
+def cache_get(key: str):
+    """Returns the cached value for key, or None on a miss."""
+    text = _MEMORY_CACHE.get(key)
+    if text is None:
+        path = os.path.join(RESPONSE_CACHE_DIR, f"{key}.json")
+        try:
+            with open(path, 'r') as f:
+                text = f.read()
+        except OSError:
+            return None
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    _memory_cache_put(key, text)
+    return value
+
+
+def cache_set(key: str, value):
+    """Stores value under key. Cache write failures are logged, never raised."""
+    text = json.dumps(value)
+    _memory_cache_put(key, text)
+    try:
+        os.makedirs(RESPONSE_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(RESPONSE_CACHE_DIR, f"{key}.json"), 'w') as f:
+            f.write(text)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write response cache: {e}")
+
+
+def clear_response_cache():
+    """Drop every cached LLM result, in memory and on disk."""
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE.clear()
+    try:
+        names = os.listdir(RESPONSE_CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith('.json'):
+            try:
+                os.remove(os.path.join(RESPONSE_CACHE_DIR, name))
+            except OSError:
+                pass
+
+
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_profile.json')
+
+# Parsed user_profile.json, reused until the file's mtime or size changes.
+# A single (key, data) tuple, replaced in one assignment so concurrent readers never see a mixed pair.
+_profile_cache = (None, None)
+
+
+def load_user_profile():
+    """
+    Returns the parsed user_profile.json, or None if it is missing or invalid.
+    Read-only: callers that modify the profile should use get_base_resume().
+    """
+    global _profile_cache
+    try:
+        st = os.stat(PROFILE_PATH)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    cached_key, cached_data = _profile_cache
+    if cached_key == key:
+        return cached_data
+    try:
+        with open(PROFILE_PATH, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"Error loading user profile: {e}")
+        return None
+    _profile_cache = (key, data)
+    return data
+
+
 def get_base_resume() -> dict:
     """
     Returns the source-of-truth resume data. 
     Tries to load from 'user_profile.json' first.
     """
-    profile_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_profile.json')
-    
-    if os.path.exists(profile_path):
-        try:
-            with open(profile_path, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading user profile: {e}")
+    profile = load_user_profile()
+    if profile is not None:
+        # Callers may modify their copy (e.g. the contact location)
+        return copy.deepcopy(profile)
 
     # Fallback to empty structure or error out in a real app
     # For now, return a placeholder compatible structure
@@ -578,6 +1069,123 @@ class JDAnalysis(BaseModel):
     company_name: str = Field(description="The canonical name of the hiring company (e.g., 'Google', 'Anthropic'). Do not use generic terms like 'Company'. If unknown, use 'Unknown_Company'.")
     job_identifier: str = Field(description="A short, file-safe identifier for the job. Prefer 'Job_<ID>' if a Job ID is prominent. Otherwise use 'Role_Name' (e.g., 'Software_Engineer'). Replace spaces with underscores.")
 
+
+class JDAnalysisResult(BaseModel):
+    """The JD analysis returned for JD_ANALYSIS_STRUCTURE. Missing fields get the fallback values."""
+    model_config = ConfigDict(extra="allow")
+
+    company_name: str = "Unknown_Company"
+    job_identifier: str = "Resume_Job"
+    location: str = "Remote"
+    job_title: str = "Data Scientist"
+    mandatory_keywords: List[str] = []
+    preferred_keywords: List[str] = []
+    soft_skills: List[str] = []
+    action_verbs: List[str] = []
+    industry_terms: List[str] = []
+    years_experience: Union[str, int, float] = ""
+
+
+class ExperienceEntry(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    company: str
+    # Profiles extracted from PDFs use "title"; resume_builder maps it to "role"
+    title: str = ""
+    role: str = ""
+    dates: str = ""
+    location: str = ""
+    bullets: List[str] = []
+
+    @model_validator(mode="after")
+    def _has_title_or_role(self):
+        if not (self.title or self.role):
+            raise ValueError("experience entry needs a title or role")
+        # Fill both so whichever key resume_builder reads has the value
+        self.title = self.title or self.role
+        self.role = self.role or self.title
+        return self
+
+
+class ProjectEntry(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str
+    dates: str = ""
+    bullets: List[str] = []
+
+
+class LeadershipEntry(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    title: str = ""
+    role: str = ""
+    organization: str = ""
+    dates: str = ""
+    location: str = ""
+    bullets: List[str] = []
+
+
+class TailoredResume(BaseModel):
+    """The sections the LLM returns when tailoring (see _llm_view); checked before rendering the PDF."""
+    model_config = ConfigDict(extra="allow")
+
+    summary: str
+    skills: Dict[str, str]
+    experience: List[ExperienceEntry]
+    projects: List[ProjectEntry] = []
+    leadership: List[LeadershipEntry] = []
+
+
+def _validate_tailored(data) -> tuple:
+    """
+    Validate a parsed tailoring response against TailoredResume.
+    Returns (resume_dict, None) when valid, (None, errors) when invalid and (None, None) when nothing was parsed.
+    """
+    if data is None:
+        return None, None
+    try:
+        return TailoredResume.model_validate(data).model_dump(), None
+    except ValidationError as e:
+        return None, str(e)
+
+
+def get_repair_prompt(response_text: str, errors: str) -> str:
+    """Ask the model to fix only the fields that failed validation."""
+    return f"""
+The JSON below is a tailored resume, but it failed validation with these errors:
+{errors}
+
+Fix ONLY the fields named in the errors (add missing fields, correct wrong types) and keep all other content exactly as it is.
+Return ONLY the corrected JSON object.
+
+JSON:
+{response_text}
+"""
+
+
+def _repair_tailored(response_text: str, errors: str, provider: str):
+    """One targeted repair call for a tailoring response that failed validation."""
+    logger.info("   🔧 Tailored resume failed validation, asking the model to fix it...")
+    try:
+        repaired = query_provider(get_repair_prompt(response_text, errors), provider, expect_json=True)
+    except Exception as e:
+        logger.warning(f"⚠️ API Error (Repair): {e}")
+        return None
+    return _validate_tailored(_extract_first_json(repaired))[0]
+
+
+async def _arepair_tailored(response_text: str, errors: str, provider: str):
+    """Async version of _repair_tailored."""
+    logger.info("   🔧 Tailored resume failed validation, asking the model to fix it...")
+    try:
+        repaired = await aquery_provider(get_repair_prompt(response_text, errors), provider, expect_json=True)
+    except Exception as e:
+        logger.warning(f"⚠️ API Error (Repair): {e}")
+        return None
+    return _validate_tailored(_extract_first_json(repaired))[0]
+
+
 def get_jd_analysis_prompt(jd_text: str) -> str:
     return f"""
     Analyze the following Job Description (JD) and extract the key information.
@@ -592,25 +1200,8 @@ def get_jd_analysis_prompt(jd_text: str) -> str:
     {jd_text}
     """
 
-def parse_job_description(jd_text: str, provider: str = "gemini") -> dict:
-    """
-    Use AI provider to analyze the job description and extract key information.
-    
-    Args:
-        jd_text: The job description text
-        provider: One of 'gemini', 'ollama', or 'openrouter'
-    
-    Returns:
-        dict with: location, job_title, keywords, action_verbs, skill_gaps
-    """
-    prompt = f"""
-Analyze this job description and extract the following information. Return ONLY valid JSON.
-
-Job Description:
-{jd_text}
-
-Extract and return this JSON structure:
-{{
+# JSON structure the LLM fills in when analyzing a job description
+JD_ANALYSIS_STRUCTURE = """{
     "company_name": "The precise name of the company hiring (e.g., 'Google', 'Anthropic'). Do not use 'Unknown' unless absolutely necessary.",
     "job_identifier": "A short, unique identifier for the folder name. Use the Job ID if found (e.g., 'R12345'), otherwise use the Role Name in Snake Case (e.g., 'Senior_Software_Engineer').",
     "location": "City, State (extract ONLY the primary location, do not list multiple)",
@@ -624,120 +1215,180 @@ Extract and return this JSON structure:
     "domain_context": "The industry/sector (e.g., Fintech, AdTech, Healthcare)",
     "tech_stack_nuances": ["specific versions (Java 17) only if mentioned in JD", "sub-tools (BigQuery, not just GCP)", "specific libraries"],
     "key_metrics_emphasis": ["scale (millions of users)", "speed (low latency)", "revenue", "efficiency"]
-}}
+}"""
 
-Be thorough in extracting keywords.
+JD_ANALYSIS_GUIDANCE = """Be thorough in extracting keywords.
 - For "tech_stack_nuances", look for specific library names (e.g., "pandas" instead of just "Python") and cloud services (e.g., "Redshift" instead of just "AWS").
-- For "industry_terms", extract business-specific language (e.g., "risk modeling", "patient outcomes", "click-through rate").
+- For "industry_terms", extract business-specific language (e.g., "risk modeling", "patient outcomes", "click-through rate")."""
+
+
+def get_parse_jd_prompt(jd_text: str) -> str:
+    """Prompt used by parse_job_description / parse_job_description_async."""
+    return f"""
+Analyze this job description and extract the following information. Return ONLY valid JSON.
+
+Job Description:
+{jd_text}
+
+Extract and return this JSON structure:
+{JD_ANALYSIS_STRUCTURE}
+
+{JD_ANALYSIS_GUIDANCE}
 """
+
+
+def parse_job_description(jd_text: str, provider: str = "gemini") -> dict:
+    """
+    Use AI provider to analyze the job description and extract key information.
+    
+    Args:
+        jd_text: The job description text
+        provider: One of 'gemini', 'ollama', or 'openrouter'
+    
+    Returns:
+        dict with: company_name, job_identifier, location, job_title, keywords, action_verbs, etc.
+        company_name must always be emitted (or 'Unknown_Company') - callers use it
+        for the output folder instead of making a separate company-name LLM call.
+    """
+    cache_key = get_cache_key("jd_analysis", provider, normalize_jd(jd_text))
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached job description analysis")
+        return cached
     
     try:
-        response_text = query_provider(prompt, provider)
-        
-        # Try to find JSON in the response
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError:
-                pass
+        response_text = query_provider(get_parse_jd_prompt(jd_text), provider)
     except Exception as e:
-        print(f"⚠️ API Error (Job Parsing): {e}")
-        print("   Using default job description values.")
+        logger.warning(f"⚠️ API Error (Job Parsing): {e}")
+        logger.info("   Using default job description values.")
+        response_text = ""
+    return _parse_jd_response(response_text, cache_key)
+
+
+async def parse_job_description_async(jd_text: str, provider: str = "gemini") -> dict:
+    """Async version of parse_job_description."""
+    cache_key = get_cache_key("jd_analysis", provider, normalize_jd(jd_text))
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached job description analysis")
+        return cached
+    
+    try:
+        response_text = await aquery_provider(get_parse_jd_prompt(jd_text), provider)
+    except Exception as e:
+        logger.warning(f"⚠️ API Error (Job Parsing): {e}")
+        logger.info("   Using default job description values.")
+        response_text = ""
+    return _parse_jd_response(response_text, cache_key)
+
+
+def _parse_jd_response(response_text: str, cache_key: str) -> dict:
+    """
+    Extract the JD analysis JSON from an LLM response, or return default values.
+    Successful parses are stored under cache_key; defaults are never cached.
+    """
+    # Try to find JSON in the response
+    jd_analysis = _validate_jd_analysis(_extract_first_json(response_text))
+    if jd_analysis is not None:
+        cache_set(cache_key, jd_analysis)
+        return jd_analysis
+
+    return default_jd_analysis()
+
+
+def _validate_jd_analysis(data):
+    """Validate a parsed JD analysis; missing or malformed fields get the fallback values. None if not an object."""
+    if not isinstance(data, dict):
+        return None
+    try:
+        return JDAnalysisResult.model_validate(data).model_dump()
+    except ValidationError as e:
+        bad_fields = {err['loc'][0] for err in e.errors() if err['loc']}
+        logger.warning(f"⚠️ JD analysis fields failed validation, using defaults for: {', '.join(map(str, bad_fields))}")
+        return JDAnalysisResult.model_validate({k: v for k, v in data.items() if k not in bad_fields}).model_dump()
 
-    # Fallback structure
-    return {
-        "company_name": "Unknown_Company",
-        "job_identifier": "Resume_Job",
-        "location": "Remote",
-        "job_title": "Data Scientist",
-        "mandatory_keywords": [],
-        "preferred_keywords": [],
-        "soft_skills": [],
-        "action_verbs": [],
-        "industry_terms": [],
-        "years_experience": ""
-    }
+
+def default_jd_analysis() -> dict:
+    """Fallback JD analysis used when the LLM call or its JSON fails."""
+    return JDAnalysisResult().model_dump()
+
+
+# Separates fields when clean_tailored_resume converts them as one string; the
+# patterns never match across it, so a stray asterisk can't pair with one in another field
+_FIELD_SEP = '\x1e'
+_BOLD_RE = re.compile(r'\*\*([^*\x1e]+)\*\*')
+_ITAL_RE = re.compile(r'\*([^*\x1e]+)\*')
 
 
 def convert_markdown_to_html(text: str) -> str:
     """Convert markdown bold (**text**) to HTML bold (<b>text</b>)."""
-    if not text:
+    if not text or '*' not in text:
         return text
-    # Convert **text** to <b>text</b>
-    text = re.sub(r'\*\*([^*]+)\*\*', r'<b>\1</b>', text)
-    # Also handle any stray single asterisks
-    text = re.sub(r'\*([^*]+)\*', r'<i>\1</i>', text)
-    return text
+    # Convert **text** to <b>text</b>, then any stray single asterisks to <i>text</i>
+    return _ITAL_RE.sub(r'<i>\1</i>', _BOLD_RE.sub(r'<b>\1</b>', text))
 
 
 def clean_tailored_resume(resume_data: dict) -> dict:
-    """Post-process the tailored resume to convert markdown to HTML."""
+    """
+    Post-process the tailored resume to convert markdown to HTML.
+    All text fields are converted in one pass over their joined text rather than one call per bullet.
+    """
+    # (container, key) for every text field to convert
+    slots = []
     
-    # Clean summary
+    # Summary
     if 'summary' in resume_data:
-        resume_data['summary'] = convert_markdown_to_html(resume_data['summary'])
+        slots.append((resume_data, 'summary'))
     
-    # Clean skills
+    # Skills
     if 'skills' in resume_data:
         for category in resume_data['skills']:
-            resume_data['skills'][category] = convert_markdown_to_html(resume_data['skills'][category])
+            slots.append((resume_data['skills'], category))
     
-    # Clean experience bullets
+    # Experience bullets
     if 'experience' in resume_data:
         for exp in resume_data['experience']:
             if 'bullets' in exp:
-                # Enforce max 3 bullets for Intern roles
+                # Enforce max 3 bullets for Intern roles, max 4 for Full-time roles
                 job_title = exp.get('title', exp.get('role', '')).lower()
-                if 'intern' in job_title:
-                    exp['bullets'] = exp['bullets'][:3]
-                else:
-                    # Enforce max 4 bullets for Full-time roles
-                    exp['bullets'] = exp['bullets'][:4]
-                
-                exp['bullets'] = [convert_markdown_to_html(b) for b in exp['bullets']]
+                limit = 3 if 'intern' in job_title else 4
+                bullets = exp['bullets'] = list(islice(exp['bullets'], limit))
+                slots.extend((bullets, i) for i in range(len(bullets)))
     
-    # Clean project bullets
-    if 'projects' in resume_data:
-        for proj in resume_data['projects']:
-            if 'bullets' in proj:
-                proj['bullets'] = [convert_markdown_to_html(b) for b in proj['bullets']]
+    # Project and leadership bullets
+    for section in ('projects', 'leadership'):
+        for item in resume_data.get(section) or []:
+            if 'bullets' in item:
+                item['bullets'] = list(item['bullets'])
+                slots.extend((item['bullets'], i) for i in range(len(item['bullets'])))
     
-    # Clean leadership bullets
-    if 'leadership' in resume_data:
-        for lead in resume_data['leadership']:
-            if 'bullets' in lead:
-                lead['bullets'] = [convert_markdown_to_html(b) for b in lead['bullets']]
+    slots = [(c, k) for c, k in slots if isinstance(c[k], str)]
+    texts = [c[k] for c, k in slots]
+    converted = convert_markdown_to_html(_FIELD_SEP.join(texts)).split(_FIELD_SEP)
+    if len(converted) != len(texts):
+        # A field contained the separator itself; convert one by one instead
+        converted = [convert_markdown_to_html(t) for t in texts]
+    for (container, key), text in zip(slots, converted):
+        container[key] = text
     
     return resume_data
 
 
-def tailor_resume(base_resume: dict, jd_analysis: dict, provider: str = "gemini") -> dict:
+@functools.lru_cache(maxsize=8)
+def get_tailoring_rules(location: str, domain_context: str, contact_in_prompt: bool = True) -> str:
     """
-    Use AI provider to tailor the resume content for ATS optimization.
-    Preserves all metrics and facts, only adjusts vocabulary.
-    
-    Args:
-        base_resume: The base resume data
-        jd_analysis: Analysis from parse_job_description
-        provider: One of 'gemini', 'ollama', or 'openrouter'
+    Returns the strict tailoring rules shared by every resume-tailoring prompt.
+    With contact_in_prompt=False the resume was sent without name/contact/education (see _llm_view).
     """
-    prompt = f"""
-You are a Strategic Resume Architect. Your PRIMARY GOAL is to achieve a 95+ ATS (Applicant Tracking System) match score.
-
-TARGET JOB ANALYSIS:
-{json.dumps(jd_analysis, indent=2)}
-
-CURRENT RESUME DATA:
-{json.dumps(base_resume, indent=2)}
-
-CRITICAL OBJECTIVE: Rewrite the resume to MAXIMIZE ATS keyword matching while maintaining authenticity.
-
-=== STRICT RULES ===
+    if contact_in_prompt:
+        contact_rules = f"""   - Set contact.location to: "{location}"
+   - **CRITICAL:** You MUST preserve `email`, `phone`, `linkedin_url`, and `portfolio_url` EXACTLY as they appear in the CURRENT RESUME DATA. Do not omit them."""
+    else:
+        contact_rules = """   - Name, contact info and education are filled in separately. Do NOT include `name`, `contact` or `education` in your output."""
+    return f"""=== STRICT RULES ===
 
 1. **Contact Info**:
-   - Set contact.location to: "{jd_analysis.get('location', 'Remote')}"
-   - **CRITICAL:** You MUST preserve `email`, `phone`, `linkedin_url`, and `portfolio_url` EXACTLY as they appear in the CURRENT RESUME DATA. Do not omit them.
+{contact_rules}
 
 2. **Summary** (Target: 2-3 full sentences, ~35-45 words):
    - Start with the exact Job Title from the JD.
@@ -794,46 +1445,217 @@ CRITICAL OBJECTIVE: Rewrite the resume to MAXIMIZE ATS keyword matching while ma
 8. **ATS Optimization & Keyword Enrichment (CRITICAL)**:
    - **Expansion**: Use `tech_stack_nuances` to map broad skills to specifics. If the user lists "GCP" and `tech_stack_nuances` includes "BigQuery ML", **explicitly list BigQuery ML**.
    - **Specificity**: Replace generic terms with JD-specific techniques (e.g., change "fine-tuning LLMs" to "PEFT/LoRA fine-tuning" if JD asks for LoRA).
-   - **Domain Alignment**: Use `domain_context` to rephrase experience. Ensure the resume reflects the language of the **{jd_analysis.get('domain_context', 'target industry')}**.
+   - **Domain Alignment**: Use `domain_context` to rephrase experience. Ensure the resume reflects the language of the **{domain_context}**.
    - **Tech Alternatives**: If a JD requirement is missing (e.g., "Spring"), heavily emphasize the user's equivalent strong alternative (e.g., "FastAPI/Flask") to show transferability.
    - Use exact keyword matches from JD (not synonyms).
    - Match industry terminology exactly.
 
-Return the complete resume as valid JSON with the same structure."""
+"""
+
+
+@functools.lru_cache(maxsize=4)
+def _tailor_prompt_prefix(resume_json: str) -> str:
+    """
+    Static part of the tailoring prompt: instructions, resume and rules.
+    It comes before the JD-specific part so providers with prefix caching can reuse it across JDs.
+    """
+    return f"""
+You are a Strategic Resume Architect. Your PRIMARY GOAL is to achieve a 95+ ATS (Applicant Tracking System) match score.
+
+CURRENT RESUME DATA:
+{resume_json}
 
+CRITICAL OBJECTIVE: Rewrite the resume to MAXIMIZE ATS keyword matching while maintaining authenticity.
+
+{get_tailoring_rules("the location from the TARGET JOB ANALYSIS below", "domain_context from the TARGET JOB ANALYSIS below", contact_in_prompt=False)}Return the complete resume as valid JSON with the same structure.
+"""
+
+
+def get_tailor_prompt(base_resume: dict, jd_analysis: dict) -> str:
+    """Prompt used by tailor_resume / tailor_resume_async."""
+    return _tailor_prompt_prefix(json.dumps(_llm_view(base_resume), indent=2)) + f"""
+TARGET JOB ANALYSIS:
+{json.dumps(jd_analysis, indent=2)}"""
+
+
+def tailor_resume(base_resume: dict, jd_analysis: dict, provider: str = "gemini") -> dict:
+    """
+    Use AI provider to tailor the resume content for ATS optimization.
+    Preserves all metrics and facts, only adjusts vocabulary.
+    
+    Args:
+        base_resume: The base resume data
+        jd_analysis: Analysis from parse_job_description
+        provider: One of 'gemini', 'ollama', or 'openrouter'
+    """
+    cache_key = _tailor_cache_key(base_resume, jd_analysis, provider)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached tailored resume")
+        return cached
+    
     try:
-        response_text = query_provider(prompt, provider)
-        
-        # Extract JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            try:
-                tailored = json.loads(json_match.group())
-                # Ensure we have all required fields
-                if 'name' in tailored and 'contact' in tailored:
-                    # Post-process to convert any remaining markdown to HTML
-                    return clean_tailored_resume(tailored)
-            except json.JSONDecodeError:
-                pass
+        response_text = query_provider(get_tailor_prompt(base_resume, jd_analysis), provider)
     except Exception as e:
-        print(f"⚠️ API Error (Tailoring): {e}")
-        print("   Using base resume without AI tailoring.")
+        logger.warning(f"⚠️ API Error (Tailoring): {e}")
+        logger.info("   Using base resume without AI tailoring.")
+        response_text = ""
+    tailored, errors = _validate_tailored(_extract_first_json(response_text))
+    if errors:
+        tailored = _repair_tailored(response_text, errors, provider)
+    return _finish_tailoring(tailored, base_resume, jd_analysis, cache_key)
+
+
+async def tailor_resume_async(base_resume: dict, jd_analysis: dict, provider: str = "gemini") -> dict:
+    """Async version of tailor_resume."""
+    cache_key = _tailor_cache_key(base_resume, jd_analysis, provider)
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached tailored resume")
+        return cached
+    
+    try:
+        response_text = await aquery_provider(get_tailor_prompt(base_resume, jd_analysis), provider)
+    except Exception as e:
+        logger.warning(f"⚠️ API Error (Tailoring): {e}")
+        logger.info("   Using base resume without AI tailoring.")
+        response_text = ""
+    tailored, errors = _validate_tailored(_extract_first_json(response_text))
+    if errors:
+        tailored = await _arepair_tailored(response_text, errors, provider)
+    return _finish_tailoring(tailored, base_resume, jd_analysis, cache_key)
+
+
+def _base_resume_version(base_resume: dict) -> str:
+    """Content hash of the base resume, so profile edits miss the cache."""
+    return get_cache_key(json.dumps(base_resume, sort_keys=True))
+
+
+def _tailor_cache_key(base_resume: dict, jd_analysis: dict, provider: str) -> str:
+    """Keyed on the JD analysis plus the base resume version."""
+    return get_cache_key("tailored_resume", provider, json.dumps(jd_analysis, sort_keys=True), _base_resume_version(base_resume))
+
+
+def _finish_tailoring(tailored, base_resume: dict, jd_analysis: dict, cache_key: str) -> dict:
+    """
+    Complete a validated tailored resume (or None), falling back to the base resume.
+    Only successful tailoring results are stored under cache_key.
+    """
+    if tailored is not None:
+        # Post-process to convert any remaining markdown to HTML
+        tailored = clean_tailored_resume(_attach_static_fields(tailored, base_resume, jd_analysis))
+        cache_set(cache_key, tailored)
+        return tailored
+
+    return _untailored_resume(base_resume, jd_analysis)
+
+
+# Sections the LLM rewrites; name, contact and education are copied over locally
+_LLM_SECTIONS = ("summary", "skills", "experience", "projects", "leadership")
+
+
+def _llm_view(resume: dict) -> dict:
+    """The parts of the resume the LLM needs to see, leaving out static fields to save input tokens."""
+    return {key: resume[key] for key in _LLM_SECTIONS if key in resume}
+
+
+def _attach_static_fields(tailored: dict, base_resume: dict, jd_analysis: dict) -> dict:
+    """Re-attach name, contact and education from the base resume, with the location set from the JD."""
+    tailored['name'] = base_resume.get('name', '')
+    tailored['contact'] = dict(base_resume.get('contact', {}))
+    tailored['education'] = base_resume.get('education', [])
+    location = (jd_analysis or {}).get('location')
+    if location and location not in ["Remote", "N/A"]:
+        tailored['contact']['location'] = location
+    return tailored
 
-    # If parsing fails or API error, return base resume with just location updated (if valid)
+
+def _untailored_resume(base_resume: dict, jd_analysis: dict) -> dict:
+    """If parsing fails or API error, return base resume with just location updated (if valid)."""
     # If location detection also failed, it usually defaults to 'Remote' or 'N/A'
-    if jd_analysis and 'location' in jd_analysis and jd_analysis['location'] not in ["Remote", "N/A"]:
-         base_resume['contact']['location'] = jd_analysis['location']
+    location = (jd_analysis or {}).get('location')
+    if location and location not in ["Remote", "N/A"]:
+         base_resume['contact']['location'] = location
          
     return base_resume
 
 
-def generate_answer(question: str, jd_text: str, provider: str = "gemini") -> str:
+@functools.lru_cache(maxsize=4)
+def _analyze_and_tailor_prompt_prefix(resume_json: str) -> str:
+    """Static part of the merged prompt; the JD goes last so the prefix can be cached provider-side."""
+    return f"""
+You are a Strategic Resume Architect. Your PRIMARY GOAL is to achieve a 95+ ATS (Applicant Tracking System) match score.
+
+Complete BOTH steps in ONE response:
+Step 1: Analyze the JOB DESCRIPTION (at the end) and extract JSON A with this structure:
+{JD_ANALYSIS_STRUCTURE}
+
+{JD_ANALYSIS_GUIDANCE}
+
+Step 2: Using JSON A as the TARGET JOB ANALYSIS, rewrite the CURRENT RESUME DATA into JSON B following the rules below.
+
+CURRENT RESUME DATA:
+{resume_json}
+
+CRITICAL OBJECTIVE: Rewrite the resume to MAXIMIZE ATS keyword matching while maintaining authenticity.
+
+{get_tailoring_rules("the location from JSON A", "domain_context from JSON A", contact_in_prompt=False)}Return ONLY one valid JSON object with exactly two top-level keys:
+{{"jd_analysis": <JSON A>, "tailored_resume": <JSON B: the complete resume with the same structure as CURRENT RESUME DATA>}}
+"""
+
+
+def get_analyze_and_tailor_prompt(jd_text: str, base_resume: dict) -> str:
+    """Single prompt that analyzes the JD and tailors the resume in one round-trip."""
+    return _analyze_and_tailor_prompt_prefix(json.dumps(_llm_view(base_resume), indent=2)) + f"""
+JOB DESCRIPTION:
+{jd_text}"""
+
+
+def analyze_and_tailor(jd_text: str, base_resume: dict, provider: str = "gemini") -> tuple:
     """
-    Generate an answer to a user's question based on their resume and the job description.
+    Analyze the job description and tailor the resume with a single LLM call.
+    Sends the JD and base resume once instead of twice (parse_job_description + tailor_resume).
+    
+    Returns:
+        (jd_analysis, tailored_resume)
     """
+    cache_key = get_cache_key("analyze_and_tailor", provider, normalize_jd(jd_text), _base_resume_version(base_resume))
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached analysis and tailored resume")
+        return cached["jd_analysis"], cached["tailored_resume"]
+    
+    try:
+        response_text = query_provider(get_analyze_and_tailor_prompt(jd_text, base_resume), provider, expect_json=True)
+    except Exception as e:
+        logger.warning(f"⚠️ API Error (Analyze & Tailor): {e}")
+        response_text = ""
+    
+    result = _extract_first_json(response_text) or {}
+    jd_analysis = _validate_jd_analysis(result.get("jd_analysis"))
+    if jd_analysis is None:
+        logger.info("   Using default job description values.")
+        jd_analysis = default_jd_analysis()
+    
+    raw_tailored = result.get("tailored_resume")
+    tailored, errors = _validate_tailored(raw_tailored)
+    if errors:
+        tailored = _repair_tailored(json.dumps(raw_tailored, indent=2), errors, provider)
+    
+    if tailored is not None:
+        tailored = clean_tailored_resume(_attach_static_fields(tailored, base_resume, jd_analysis))
+        cache_set(cache_key, {"jd_analysis": jd_analysis, "tailored_resume": tailored})
+        return jd_analysis, tailored
+    
+    logger.info("   Using base resume without AI tailoring.")
+    return jd_analysis, _untailored_resume(base_resume, jd_analysis)
+
+
+def get_answer_prompt(question: str, jd_text: str) -> str:
+    """Build the prompt for answering a user's question about the job."""
     base_resume = get_base_resume()
     
-    prompt = f"""
+    return f"""
 You are a career coach and technical interviewer assisting the candidate during a job application or interview.
 
 CANDIDATE PROFILE:
@@ -854,10 +1676,33 @@ Provide a concise, direct answer or talking point that the candidate can use.
 - Keep the tone professional and confident.
 - Answer in PLAIN TEXT only. Do NOT use markdown, bolding, italics, bullet points, or headers.
 """
+
+
+def generate_answer(question: str, jd_text: str, provider: str = "gemini") -> str:
+    """
+    Generate an answer to a user's question based on their resume and the job description.
+    """
+    cache_key = get_cache_key("answer", provider, question.strip(), normalize_jd(jd_text), _base_resume_version(get_base_resume()))
+    cached = cache_get(cache_key)
+    if cached is not None:
+        logger.info("   ♻️ Using cached answer")
+        return cached
+    
     try:
-        return query_provider(prompt, provider)
+        answer = query_provider(get_answer_prompt(question, jd_text), provider)
     except Exception as e:
         return f"Error generating answer: {str(e)}"
+    if answer:
+        cache_set(cache_key, answer)
+    return answer
+
+
+def stream_answer(question: str, jd_text: str, provider: str = "gemini"):
+    """Streaming version of generate_answer: yields text chunks as they arrive."""
+    try:
+        yield from stream_provider(get_answer_prompt(question, jd_text), provider)
+    except Exception as e:
+        yield f"Error generating answer: {str(e)}"
 
 
 def generate_tailored_resume(jd_text: str, output_filename: str = "Tailored_Resume.pdf") -> str:
@@ -874,23 +1719,99 @@ def generate_tailored_resume(jd_text: str, output_filename: str = "Tailored_Resu
     print("📄 Loading base resume...")
     base_resume = get_base_resume()
     
-    print("🔍 Analyzing job description with Gemini...")
-    jd_analysis = parse_job_description(jd_text)
+    print("🔍 Analyzing job description and tailoring resume with Gemini...")
+    jd_analysis, tailored_resume = analyze_and_tailor(jd_text, base_resume)
     print(f"   📍 Location: {jd_analysis.get('location', 'N/A')}")
     print(f"   💼 Title: {jd_analysis.get('job_title', 'N/A')}")
     print(f"   🔑 Keywords found: {len(jd_analysis.get('mandatory_keywords', []))} mandatory, "
           f"{len(jd_analysis.get('preferred_keywords', []))} preferred")
     
-    print("✨ Tailoring resume for ATS optimization...")
-    tailored_resume = tailor_resume(base_resume, jd_analysis)
-    
     print("📝 Generating PDF...")
+    from resume_builder import create_resume_pdf  # ReportLab loads only when a PDF is built
     output_path = create_resume_pdf(tailored_resume, output_filename)
     
     print(f"✅ Resume generated: {output_path}")
     return output_path
 
 
+async def generate_tailored_resume_async(jd_text: str, output_filename: str = "Tailored_Resume.pdf", provider: str = "gemini") -> str:
+    """
+    Async version of generate_tailored_resume.
+    Parse and tailor still run in order for one JD, but several JDs can overlap.
+    """
+    tailored_resume = await _tailor_for_jd_async(jd_text, output_filename, provider)
+    
+    # ReportLab is blocking; keep it off the event loop
+    from resume_builder import create_resume_pdf
+    output_path = await asyncio.to_thread(create_resume_pdf, tailored_resume, output_filename)
+    print(f"✅ Resume generated: {output_path}")
+    return output_path
+
+
+async def _tailor_for_jd_async(jd_text: str, label: str, provider: str) -> dict:
+    """LLM half of generate_tailored_resume_async: parse the JD, then tailor the base resume to it."""
+    base_resume = get_base_resume()
+    
+    jd_analysis = await parse_job_description_async(jd_text, provider)
+    print(f"   💼 {label}: {jd_analysis.get('job_title', 'N/A')} ({jd_analysis.get('location', 'N/A')})")
+    
+    return await tailor_resume_async(base_resume, jd_analysis, provider)
+
+
+# How many JDs a batch sends to each provider at once (roughly its rate limit; Ollama is a single local model)
+BATCH_CONCURRENCY = {"gemini": 5, "ollama": 1, "openrouter": 4, "groq": 3}
+
+
+def generate_tailored_resumes_batch(jd_texts: List[str], provider: str = "gemini", max_concurrency: int = None) -> List[str]:
+    """
+    Generate one tailored resume per job description, processing JDs concurrently.
+    At most max_concurrency JDs (default: BATCH_CONCURRENCY for the provider) are in flight at once,
+    and identical JDs (after normalization) are generated only once.
+    
+    Returns:
+        Paths to the generated PDFs, in the same order as jd_texts
+    """
+    if max_concurrency is None:
+        max_concurrency = BATCH_CONCURRENCY.get(provider, 5)
+    
+    # First index of each distinct JD; duplicates share its PDF
+    first_index = {}
+    for i, jd_text in enumerate(jd_texts):
+        first_index.setdefault(normalize_jd(jd_text), i)
+    unique = sorted(first_index.values())
+    if len(unique) < len(jd_texts):
+        print(f"   ♻️ Skipping {len(jd_texts) - len(unique)} duplicate job description(s)")
+    
+    from resume_builder import create_resume_pdf
+    
+    async def run_all(pdf_pool):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+        
+        async def run_one(i):
+            output_filename = f"Tailored_Resume_{i + 1}.pdf"
+            # Only the LLM calls count against the provider limit; the slot frees up
+            # while this PDF renders, so the next JD's calls overlap with it
+            async with semaphore:
+                tailored_resume = await _tailor_for_jd_async(jd_texts[i], output_filename, provider)
+            output_path = await loop.run_in_executor(pdf_pool, create_resume_pdf, tailored_resume, output_filename)
+            print(f"✅ Resume generated: {output_path}")
+            return output_path
+        
+        try:
+            return await asyncio.gather(*(run_one(i) for i in unique))
+        finally:
+            await _close_async_client()
+    
+    with ThreadPoolExecutor(max_workers=4) as pdf_pool:
+        paths = dict(zip(unique, asyncio.run(run_all(pdf_pool))))
+    return [paths[first_index[normalize_jd(jd_text)]] for jd_text in jd_texts]
+
+
+# A line containing only END terminates a pasted job description
+_END_LINE = re.compile(r'^[ \t]*END[ \t]*$', re.IGNORECASE | re.MULTILINE)
+
+
 def main():
     """CLI entry point - accepts job description input."""
     print("=" * 60)
@@ -905,21 +1826,39 @@ def main():
         print("   See .env.example for the format.")
         return
     
+    # Batch mode: python main.py <directory of .txt job descriptions>
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        jd_dir = sys.argv[1]
+        jd_files = sorted(f for f in os.listdir(jd_dir) if f.endswith(".txt"))
+        jd_texts = []
+        for name in jd_files:
+            with open(os.path.join(jd_dir, name), "r") as f:
+                jd_texts.append(f.read())
+        
+        print(f"📂 Generating {len(jd_texts)} resumes from {jd_dir}...")
+        for name, path in zip(jd_files, generate_tailored_resumes_batch(jd_texts)):
+            print(f"   {name} -> {path}")
+        return
+    
     print("Paste the Job Description below.")
     print("When done, enter an empty line followed by 'END' on a new line:")
     print("-" * 60)
     
-    lines = []
-    while True:
-        try:
-            line = input()
-            if line.strip().upper() == 'END':
+    if sys.stdin.isatty():
+        # Interactive: stop as soon as the user types END
+        lines = []
+        while True:
+            try:
+                line = input()
+                if line.strip().upper() == 'END':
+                    break
+                lines.append(line)
+            except EOFError:
                 break
-            lines.append(line)
-        except EOFError:
-            break
-    
-    jd_text = '\n'.join(lines)
+        jd_text = '\n'.join(lines)
+    else:
+        # Piped/redirected input: read it in one go, keeping everything before an END line
+        jd_text = _END_LINE.split(sys.stdin.read(), maxsplit=1)[0].rstrip()
     
     if not jd_text.strip():
         print("❌ No job description provided. Exiting.")
@@ -941,4 +1880,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
@@ -0,0 +1,47 @@
+"""
+PDF rendering jobs run in server.py's process pool.
+Workers import this module to unpickle the jobs, so it must stay free of import-time side effects.
+"""
+
+import os
+import shutil
+import threading
+
+from resume_builder import create_resume_pdf
+
+
+def publish_pdf(cached_path, output_path):
+    """Point output_path at the cached PDF (hard link, or a copy across filesystems) without writing through it."""
+    # Already a link to this PDF: os.replace would be a no-op and leave the tmp link behind
+    if os.path.exists(output_path) and os.path.samefile(cached_path, output_path):
+        return output_path
+    # pid + thread id, since the server also publishes cache hits from its request threads
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)  # Left over from an interrupted publish
+        try:
+            os.link(cached_path, tmp_path)
+        except OSError:
+            shutil.copyfile(cached_path, tmp_path)
+        # Replace rather than overwrite, so the cached file is never truncated through an old link
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+
+def render_to_cache(resume_data, cached_path):
+    """Worker-process job: render into the PDF cache. server.py publishes it to the output path."""
+    if not os.path.exists(cached_path):
+        # Render beside the cache entry and move it into place, so a concurrent request
+        # never sees (and links) a half-written PDF under cached_path
+        tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+        try:
+            create_resume_pdf(resume_data, tmp_path)
+            os.replace(tmp_path, cached_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return cached_path
@@ -3,6 +3,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib import colors
+import os
 import re
 
 # --- CONFIGURATION ---
@@ -272,6 +273,7 @@ def create_aligned_row(left_text, right_text, style_obj):
     return t
 
 def generate_resume(data, filename):
+    # filename may be a path or an open binary file object
     # Use BaseDocTemplate for precise frame control (zero padding)
     doc = BaseDocTemplate(
         filename,
@@ -460,6 +462,14 @@ def create_resume_pdf(data, output_path):
     
     print(f"   📏 Final height: {estimated_height:.0f}pt")
 
-    generate_resume(new_data, output_path)
+    # Hand ReportLab an open, buffered file so the PDF is written straight to disk
+    try:
+        with open(output_path, 'wb', buffering=65536) as f:
+            generate_resume(new_data, f)
+    except Exception:
+        # Don't leave a truncated PDF behind
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
     return output_path
 
@@ -0,0 +1,130 @@
+"""
+Near-duplicate JD cache
+Reuses a previous JD analysis + tailored resume when the same posting arrives again
+with small differences (HTML remnants, tracking text, reordered whitespace).
+"""
+
+import os
+import re
+import json
+import html
+import zlib
+import logging
+import threading
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.resume_cache', 'semantic_index.json')
+
+# Estimated Jaccard similarity of the JDs' word 3-grams needed for a hit
+SIMILARITY_THRESHOLD = 0.9
+# Number of smallest shingle hashes kept per JD (a "bottom-k" sketch); exact for shorter JDs
+SKETCH_SIZE = 256
+MAX_ENTRIES = 500
+
+logger = logging.getLogger(__name__)
+
+_TAG = re.compile(r'<[^>]+>')
+_WORD = re.compile(r'\w+')
+
+_lock = threading.Lock()
+_entries = None  # Loaded from CACHE_PATH on first use
+
+# Disk writes happen outside _lock so lookups never wait on them; each change bumps the
+# generation, and an older snapshot is never written over a newer one
+_write_lock = threading.Lock()
+_generation = 0
+_saved_generation = 0
+
+
+def _sketch(jd_text: str) -> list:
+    """Bottom-k sketch of the JD's word 3-grams, ignoring markup, case and punctuation."""
+    words = _WORD.findall(html.unescape(_TAG.sub(' ', jd_text)).lower())
+    shingles = {' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+    # crc32 rather than hash() so sketches stay comparable across processes
+    return sorted({zlib.crc32(s.encode('utf-8')) for s in shingles})[:SKETCH_SIZE]
+
+
+def _similarity(a: list, b: list) -> float:
+    """Estimated Jaccard similarity of two bottom-k sketches."""
+    set_a, set_b = set(a), set(b)
+    union = sorted(set_a | set_b)[:SKETCH_SIZE]
+    if not union:
+        return 0.0
+    return sum(1 for h in union if h in set_a and h in set_b) / len(union)
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        try:
+            with open(CACHE_PATH, 'r') as f:
+                _entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _entries = []
+    return _entries
+
+
+def _save(snapshot: list, generation: int):
+    """Write snapshot to CACHE_PATH via a temp file, so a crash mid-write can't corrupt the index."""
+    global _saved_generation
+    with _write_lock:
+        if generation < _saved_generation:
+            return  # A newer snapshot is already on disk
+        tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, CACHE_PATH)
+            _saved_generation = generation
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write semantic cache: {e}")
+
+
+def lookup(jd_text: str, scope: str):
+    """
+    Returns the value stored for the most similar JD under the same scope
+    (e.g. provider + base resume version), or None if nothing is similar enough.
+    """
+    sketch = _sketch(jd_text)
+    with _lock:
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for entry in _load():
+            if entry['scope'] != scope:
+                continue
+            score = _similarity(sketch, entry['sketch'])
+            if score >= best_score:
+                best, best_score = entry, score
+    if best is None:
+        return None
+    logger.info(f"   ♻️ Near-duplicate JD found (similarity {best_score:.2f})")
+    return best['value']
+
+
+def store(jd_text: str, scope: str, value):
+    """Remember value for this JD; the oldest entries are dropped past MAX_ENTRIES."""
+    global _generation
+    entry = {'scope': scope, 'sketch': _sketch(jd_text), 'value': value}
+    with _lock:
+        entries = _load()
+        entries.append(entry)
+        del entries[:-MAX_ENTRIES]
+        _generation += 1
+        generation = _generation
+        snapshot = list(entries)  # Entries are never mutated, so a shallow copy is a stable snapshot
+    _save(snapshot, generation)
+
+
+def invalidate():
+    """Forget every stored JD."""
+    global _entries, _generation, _saved_generation
+    with _lock:
+        _entries = []
+        _generation += 1
+        generation = _generation
+    with _write_lock:
+        # Also stops a store() that started before this from writing its older snapshot afterwards
+        _saved_generation = max(_saved_generation, generation)
+        try:
+            os.remove(CACHE_PATH)
+        except OSError:
+            pass
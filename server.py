@@ -1,16 +1,95 @@
 import os
 import re
-from urllib.parse import urlparse
-from flask import Flask, request, send_file, jsonify, send_from_directory
+from flask import Flask, request, send_file, jsonify, send_from_directory, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import orjson
 from flask_cors import CORS
-from main import get_base_resume, parse_job_description, tailor_resume, generate_answer, extract_text_from_pdf, extract_base_resume_info, analyze_resume_with_jd
+from main import get_base_resume, analyze_and_tailor, generate_answer, stream_answer, extract_text_from_pdf, extract_base_resume_info, analyze_resume_with_jd, get_cache_key, cache_get, cache_set, clear_response_cache, load_user_profile, warm_up_providers
+import semantic_cache
 import json
 
-
-from resume_builder import create_resume_pdf
+from pdf_worker import publish_pdf, render_to_cache
 import time
+import hashlib
+import functools
+import multiprocessing
+import threading
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import quote
+from typing import Literal
+from pydantic import BaseModel, ValidationError
+from werkzeug.utils import safe_join
+
+class ORJSONProvider(DefaultJSONProvider):
+    """request.json / jsonify through orjson; /generate responses carry the whole tailored resume."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+# Request handlers (and the main / semantic_cache code they call) only append to an in-memory queue;
+# a background listener does the file I/O, so concurrent requests don't contend on stdout
+LOG_FILE = os.getenv("LOG_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.log'))
+logger = logging.getLogger(__name__)
+_log_queue = queue.SimpleQueue()
+# Spawned PDF workers re-import this file as __mp_main__ when it is run as a script;
+# only the real server process should own the listener and the log file
+if __name__ != '__mp_main__':
+    _file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+    _file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    _log_listener = QueueListener(_log_queue, _file_handler)
+    logging.root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logging.root.addHandler(QueueHandler(_log_queue))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+# Request bodies, validated by pydantic instead of per-key checks in each endpoint
+Provider = Literal["gemini", "ollama", "openrouter", "groq", "fastest"]
+
+
+class GenerateRequest(BaseModel):
+    jd_text: str
+    url: str = ''
+    provider: Provider = 'gemini'
+
+
+class AnswerRequest(BaseModel):
+    question: str
+    jd_text: str
+    provider: Provider = 'gemini'
+    stream: bool = False
+
+
+class AnalyzeRequest(BaseModel):
+    resume_data: dict
+    jd_text: str
+
+
+class RegeneratePdfRequest(BaseModel):
+    resume_data: dict
+    filename: str = 'Regenerated_Resume.pdf'
+    company_name: str = 'Manual_Edit'
+
+
+def parse_request(model):
+    """Validate the JSON body against model. Returns (parsed, None) or (None, 400 response)."""
+    try:
+        return model.model_validate(request.get_json(silent=True) or {}), None
+    except ValidationError as e:
+        message = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'body'}: {err['msg']}" for err in e.errors())
+        return None, (jsonify({"error": message}), 400)
+
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # Enable CORS for Chrome Extension
 
 # Ensure generated_resumes directory exists
@@ -18,116 +97,353 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RESUME_DIR = os.path.join(BASE_DIR, 'generated_resumes')
 os.makedirs(RESUME_DIR, exist_ok=True)
 
+# /generate renders PDFs here and responds as soon as the tailored resume is ready,
+# so the client can start /analyze while ReportLab runs; /view waits for a PDF still in progress.
+# ReportLab is pure-Python CPU work, so worker processes keep it from holding this process's GIL.
+# Workers are spawned, not forked: the server already runs the log listener and request threads,
+# and forking a multi-threaded process can deadlock the child on a lock held by another thread.
+def _new_pdf_pool():
+    return ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn"))
+
+
+_PDF_POOL = _new_pdf_pool()
+_PDF_POOL_LOCK = threading.Lock()
+PDF_TIMEOUT = 30  # seconds
+_PENDING_PDFS = {}  # absolute output path -> Future
+
+# When deployed behind nginx, set to its internal location for RESUME_DIR (e.g. "/internal_resumes/")
+# and /view hands the file off with X-Accel-Redirect so nginx sends it with sendfile(2)
+X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "")
+
+
+# Directories already created this process; repeat companies need one stat instead of makedirs
+_known_dirs = set()
+_known_dirs_lock = threading.Lock()
+
+
+def ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), remembered per process."""
+    # The isdir check catches folders deleted while the server is running
+    if path in _known_dirs and os.path.isdir(path):
+        return path
+    os.makedirs(path, exist_ok=True)
+    with _known_dirs_lock:
+        _known_dirs.add(path)
+    return path
+
+
+# Rendered PDFs by content: identical resume data (e.g. "regenerate" clicked twice) skips ReportLab.
+# The template version changes whenever the layout/trimming code does, so old PDFs aren't reused.
+PDF_CACHE_DIR = os.path.join(BASE_DIR, '.pdf_cache')
+PDF_CACHE_MAX_FILES = 500  # Oldest renders are dropped past this
+os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _template_version():
+    """Hash of the rendering/trimming source, computed on first use."""
+    with open(os.path.join(BASE_DIR, 'resume_builder.py'), 'rb') as f1, open(os.path.join(BASE_DIR, 'main.py'), 'rb') as f2:
+        return hashlib.blake2b(f1.read() + f2.read(), digest_size=8).digest()
+
+
+def _pdf_cache_path(resume_data):
+    key = hashlib.blake2b(
+        orjson.dumps(resume_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) + _template_version(),
+        digest_size=16
+    ).hexdigest()
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _cached_pdfs():
+    """Paths of the completed PDFs in the cache (in-progress renders are .tmp files)."""
+    try:
+        names = os.listdir(PDF_CACHE_DIR)
+    except OSError:
+        return []
+    return [os.path.join(PDF_CACHE_DIR, name) for name in names if name.endswith('.pdf')]
+
+
+def _prune_pdf_cache():
+    """Drop the oldest cached PDFs past PDF_CACHE_MAX_FILES. Published copies are hard links, so they survive."""
+    paths = _cached_pdfs()
+    if len(paths) <= PDF_CACHE_MAX_FILES:
+        return
+    def mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+    for path in sorted(paths, key=mtime)[:len(paths) - PDF_CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear_pdf_cache():
+    """Forget every cached PDF."""
+    for path in _cached_pdfs():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _replace_broken_pool(broken):
+    """A dead worker (OOM kill, crash in ReportLab) breaks the whole pool; swap in a new one once."""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is broken:
+            logger.warning("⚠️ PDF worker pool broke (a worker died), starting a new one")
+            broken.shutdown(wait=False, cancel_futures=True)
+            _PDF_POOL = _new_pdf_pool()
+        return _PDF_POOL
+
+
+def _submit_render(resume_data, cached_path):
+    """render_to_cache on the pool, retried once on a fresh pool if the current one is or becomes broken."""
+    pool = _PDF_POOL
+    try:
+        first = pool.submit(render_to_cache, resume_data, cached_path)
+    except BrokenProcessPool:
+        return _replace_broken_pool(pool).submit(render_to_cache, resume_data, cached_path)
+
+    future = Future()
+
+    def copy_result(f):
+        try:
+            future.set_result(f.result())
+        except Exception as e:
+            future.set_exception(e)
+
+    def on_done(f):
+        if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool):
+            try:
+                _replace_broken_pool(pool).submit(render_to_cache, resume_data, cached_path).add_done_callback(copy_result)
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            copy_result(f)
+
+    first.add_done_callback(on_done)
+    return future
+
+
+def _publish_after(rendered, previous, cached_path, path):
+    """
+    Future that links cached_path into path once rendered (the cache fill) is done and any
+    earlier publish to path has finished, so an older render can't overwrite a newer PDF.
+    """
+    future = Future()
+
+    def publish(_):
+        if not future.set_running_or_notify_cancel():
+            return  # Superseded by a newer render of the same path
+        try:
+            rendered.result()
+            future.set_result(publish_pdf(cached_path, path))
+        except Exception as e:
+            future.set_exception(e)
+
+    if previous is None:
+        rendered.add_done_callback(publish)
+    else:
+        rendered.add_done_callback(lambda _: previous.add_done_callback(publish))
+    return future
+
+
+def _pdf_done(path, future):
+    """Forget a finished render. Failures are logged and kept so /view can report them."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error generating PDF for {path}", exc_info=future.exception())
+        return
+    # Only forget the future if a newer render of the same path hasn't replaced it
+    if _PENDING_PDFS.get(path) is future:
+        _PENDING_PDFS.pop(path, None)
+
+
+def render_pdf_async(resume_data, output_path):
+    """Queue create_resume_pdf on the PDF pool; /view blocks on it until it finishes."""
+    path = os.path.abspath(output_path)
+    cached_path = _pdf_cache_path(resume_data)
+    previous = _PENDING_PDFS.get(path)
+    if previous is not None:
+        previous.cancel()  # Only succeeds if it hasn't started publishing; otherwise we queue behind it
+    if os.path.exists(cached_path):
+        logger.debug("♻️ Reusing previously rendered PDF")
+        rendered = Future()
+        rendered.set_result(cached_path)
+    else:
+        rendered = _submit_render(resume_data, cached_path)
+        _prune_pdf_cache()
+    future = _publish_after(rendered, previous, cached_path, path)
+    _PENDING_PDFS[path] = future
+    future.add_done_callback(lambda f: _pdf_done(path, f))
+    return future
+
 @app.route('/view/<path:filename>', methods=['GET'])
 def view_resume(filename):
     """Serve the generated resume PDF. Handles nested paths."""
-    return send_from_directory(RESUME_DIR, filename)
+    pending_path = os.path.abspath(os.path.join(RESUME_DIR, filename))
+    pending = _PENDING_PDFS.get(pending_path)
+    if pending is not None:
+        try:
+            pending.result(timeout=PDF_TIMEOUT)
+        except Exception as e:
+            # Reported once; the failure was already logged when the render finished
+            if pending.done() and _PENDING_PDFS.get(pending_path) is pending:
+                _PENDING_PDFS.pop(pending_path, None)
+            return jsonify({"error": f"PDF generation failed: {str(e)}"}), 500
+    path = safe_join(RESUME_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        return jsonify({"error": "Not found"}), 404
+    # Every render replaces the file, so mtime + size identify its contents without hashing them
+    st = os.stat(path)
+    etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif X_ACCEL_PREFIX:
+        response = Response(headers={
+            "X-Accel-Redirect": X_ACCEL_PREFIX.rstrip('/') + '/' + quote(filename),
+            "Content-Type": "application/pdf",
+        })
+    else:
+        response = send_from_directory(RESUME_DIR, filename, etag=False)
+    response.set_etag(etag, weak=True)
+    # Revalidate every time: /regenerate_pdf rewrites the same URL, so a max-age could show a stale PDF
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 @app.route('/answer_question', methods=['POST'])
 def answer_question():
     try:
-        data = request.json
-        if not data or 'question' not in data or 'jd_text' not in data:
-            return jsonify({"error": "Missing question or jd_text"}), 400
+        req, error = parse_request(AnswerRequest)
+        if error:
+            return error
             
-        question = data['question']
-        jd_text = data['jd_text']
-        provider = data.get('provider', 'gemini')
+        question = req.question
+        jd_text = req.jd_text
+        provider = req.provider
         
-        print(f"Generating answer for: {question} (Provider: {provider})")
+        logger.info(f"Generating answer for: {question} (Provider: {provider})")
+        if req.stream:
+            # Plain-text chunks as the model produces them, so the answer starts appearing immediately
+            return Response(stream_with_context(stream_answer(question, jd_text, provider)), mimetype='text/plain')
         answer = generate_answer(question, jd_text, provider)
         
         return jsonify({"answer": answer})
     except Exception as e:
-        print(f"Error answering question: {str(e)}")
+        logger.exception(f"Error answering question: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Optional scheme, optional "www.", then the first label of the host
+_HOST_RE = re.compile(r'^(?:[a-z][a-z0-9+.-]*://)?(?:www\.)?([^./:?#]+)', re.IGNORECASE)
+
 def extract_company_name(url):
     """Extract company name from URL (e.g., www.google.com -> google)."""
     if not url:
         return "Unknown_Company"
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        # Remove www. and .com/.org/etc
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        company = domain.split('.')[0]
-        return company.capitalize()
-    except:
-        return "Unknown_Company"
+    match = _HOST_RE.match(url)
+    return match.group(1).capitalize() if match else "Unknown_Company"
+
+def _tailor_and_render(req):
+    """Shared by /generate and /generate_and_analyze: tailor the resume and start its PDF render."""
+    jd_text = req.jd_text
+    job_url = req.url
+    provider = req.provider
+    
+    base_resume = get_base_resume()
+    # Near-duplicates of an earlier JD (same provider and profile) reuse its results
+    semantic_scope = get_cache_key(provider, json.dumps(base_resume, sort_keys=True))
+    cached = semantic_cache.lookup(jd_text, semantic_scope)
+    
+    if cached:
+        jd_analysis = cached['jd_analysis']
+        tailored_resume = cached['tailored_resume']
+    else:
+        # 1-2. Parse JD and tailor resume in one LLM round-trip
+        logger.info(f"Analyzing Job Description and Tailoring Resume... (Provider: {provider})")
+        jd_analysis, tailored_resume = analyze_and_tailor(jd_text, base_resume, provider=provider)
+        # analyze_and_tailor hands back base_resume itself when tailoring failed; don't remember that
+        if tailored_resume is not base_resume:
+            semantic_cache.store(jd_text, semantic_scope, {"jd_analysis": jd_analysis, "tailored_resume": tailored_resume})
+    
+    # 3. Create Directory Structure
+    # Use AI-extracted names if available, fallback to URL parsing
+    ai_company = jd_analysis.get('company_name', 'Unknown_Company').replace(" ", "_").replace("/", "-")
+    ai_job_id = jd_analysis.get('job_identifier', 'Job').replace(" ", "_").replace("/", "-")
+    
+    if ai_company == "Unknown_Company":
+         ai_company = extract_company_name(job_url)
+    
+    # Structure: generated_resumes/{Company}/{Job_ID}/
+    # E.g. generated_resumes/Google/Senior_Software_Engineer/
+    company_dir = os.path.join(RESUME_DIR, ai_company, ai_job_id)
+    ensure_dir(company_dir)
+    
+    # 4. Generate PDF
+    logger.info(f"Generating PDF for {ai_company} / {ai_job_id}...")
+    safe_name = base_resume.get('name', 'Resume').replace(" ", "_")
+    filename = f"{safe_name}_Resume.pdf"
+    output_path = os.path.join(company_dir, filename)
+        
+    render_pdf_async(tailored_resume, output_path)
+    
+    # 5. Return URL for preview
+    # Construct local URL with nested path
+    # Encode parts to ensure URL safety
+    safe_company_url = quote(ai_company)
+    safe_job_url = quote(ai_job_id)
+    view_url = f"http://localhost:8000/view/{safe_company_url}/{safe_job_url}/{filename}"
+    
+    return {
+        "status": "success",
+        "view_url": view_url,
+        "filename": filename,
+        "resume_data": tailored_resume # Use this for analysis
+    }
 
 @app.route('/generate', methods=['POST'])
 def generate_resume():
     try:
-        data = request.json
-        if not data or 'jd_text' not in data:
-            return jsonify({"error": "No job description text provided"}), 400
+        req, error = parse_request(GenerateRequest)
+        if error:
+            return error
             
-        jd_text = data['jd_text']
-        job_url = data.get('url', '')
-        # Provider can be 'gemini', 'ollama', or 'openrouter'
-        provider = data.get('provider', 'gemini')
-        
-        # 1. Parse JD
-        print(f"Parsing Job Description... (Provider: {provider})")
-        jd_analysis = parse_job_description(jd_text, provider=provider)
-        
-        # 2. Tailor Resume
-        print("Tailoring Resume...")
-        base_resume = get_base_resume()
-        tailored_resume = tailor_resume(base_resume, jd_analysis, provider=provider)
-        
-        # 3. Create Directory Structure
-        # Use AI-extracted names if available, fallback to URL parsing
-        ai_company = jd_analysis.get('company_name', 'Unknown_Company').replace(" ", "_").replace("/", "-")
-        ai_job_id = jd_analysis.get('job_identifier', 'Job').replace(" ", "_").replace("/", "-")
-        
-        if ai_company == "Unknown_Company":
-             ai_company = extract_company_name(job_url)
-        
-        # Structure: generated_resumes/{Company}/{Job_ID}/
-        # E.g. generated_resumes/Google/Senior_Software_Engineer/
-        company_dir = os.path.join(RESUME_DIR, ai_company, ai_job_id)
-        os.makedirs(company_dir, exist_ok=True)
-        
-        # 4. Generate PDF
-        print(f"Generating PDF for {ai_company} / {ai_job_id}...")
-        safe_name = base_resume.get('name', 'Resume').replace(" ", "_")
-        filename = f"{safe_name}_Resume.pdf"
-        output_path = os.path.join(company_dir, filename)
+        return jsonify(_tailor_and_render(req))
+
+    except Exception as e:
+        logger.exception(f"Error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/generate_and_analyze', methods=['POST'])
+def generate_and_analyze():
+    """/generate followed by /analyze of the tailored resume in one request, saving the client a round-trip."""
+    try:
+        req, error = parse_request(GenerateRequest)
+        if error:
+            return error
             
-        create_resume_pdf(tailored_resume, output_path)
-        
-        # 5. Return URL for preview
-        # Construct local URL with nested path
-        # Encode parts to ensure URL safety
-        from urllib.parse import quote
-        safe_company_url = quote(ai_company)
-        safe_job_url = quote(ai_job_id)
-        view_url = f"http://localhost:8000/view/{safe_company_url}/{safe_job_url}/{filename}"
+        result = _tailor_and_render(req)
+        # The PDF keeps rendering in the pool while the analysis call runs
+        result["analysis"] = analyze_resume_with_jd(result["resume_data"], req.jd_text)
         
-        return jsonify({
-            "status": "success",
-            "view_url": view_url,
-            "filename": filename,
-            "resume_data": tailored_resume # Use this for analysis
-        })
+        return jsonify(result)
 
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.exception(f"Error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analyze', methods=['POST'])
 def analyze_resume_endpoint():
     """Analyze the resume against JD."""
     try:
-        data = request.json
-        if not data or 'resume_data' not in data or 'jd_text' not in data:
-            return jsonify({"error": "Missing resume_data or jd_text"}), 400
+        req, error = parse_request(AnalyzeRequest)
+        if error:
+            return error
             
-        resume_data = data['resume_data']
-        jd_text = data['jd_text']
+        resume_data = req.resume_data
+        jd_text = req.jd_text
         
         # Call the analysis function
         analysis = analyze_resume_with_jd(resume_data, jd_text)
@@ -135,9 +451,17 @@ def analyze_resume_endpoint():
         return jsonify(analysis)
         
     except Exception as e:
-        print(f"Error analyzing resume: {str(e)}")
+        logger.exception(f"Error analyzing resume: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Clear the exact-match and near-duplicate LLM response caches and the rendered-PDF cache."""
+    clear_response_cache()
+    semantic_cache.invalidate()
+    clear_pdf_cache()
+    return jsonify({"status": "success"})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "ok"}), 200
@@ -145,37 +469,32 @@ def health_check():
 @app.route('/profile_status', methods=['GET'])
 def profile_status():
     """Check if a user profile exists."""
-    profile_path = os.path.join(BASE_DIR, 'user_profile.json')
-    if os.path.exists(profile_path):
-        try:
-            with open(profile_path, 'r') as f:
-                data = json.load(f)
-                return jsonify({"exists": True, "name": data.get('name', 'User')})
-        except:
-            return jsonify({"exists": False})
+    data = load_user_profile()
+    if data is not None:
+        return jsonify({"exists": True, "name": data.get('name', 'User')})
     return jsonify({"exists": False})
 
 @app.route('/regenerate_pdf', methods=['POST'])
 def regenerate_pdf():
     """Regenerate PDF with manually edited data."""
     try:
-        data = request.json
-        if not data or 'resume_data' not in data:
-            return jsonify({"error": "Missing resume_data"}), 400
+        req, error = parse_request(RegeneratePdfRequest)
+        if error:
+            return error
             
-        resume_data = data['resume_data']
+        resume_data = req.resume_data
         # optional: allow overriding filename or company
-        filename = data.get('filename', 'Regenerated_Resume.pdf')
-        company_name = data.get('company_name', 'Manual_Edit')
+        filename = req.filename
+        company_name = req.company_name
         
         # Create Directory Structure
         company_dir = os.path.join(RESUME_DIR, company_name)
-        os.makedirs(company_dir, exist_ok=True)
+        ensure_dir(company_dir)
         
         output_path = os.path.join(company_dir, filename)
         
-        print(f"Regenerating PDF for {company_name} at {output_path}...")
-        create_resume_pdf(resume_data, output_path)
+        logger.info(f"Regenerating PDF for {company_name} at {output_path}...")
+        render_pdf_async(resume_data, output_path).result(timeout=PDF_TIMEOUT)
         
         # Return new URL
         view_url = f"http://localhost:8000/view/{company_name}/{filename}"
@@ -187,7 +506,7 @@ def regenerate_pdf():
         })
         
     except Exception as e:
-        print(f"Error regenerating PDF: {str(e)}")
+        logger.exception(f"Error regenerating PDF: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -202,37 +521,46 @@ def upload_resume_endpoint():
         return jsonify({"error": "No selected file"}), 400
         
     try:
-        # Save temp file
-        temp_path = os.path.join(BASE_DIR, "temp_upload.pdf")
-        file.save(temp_path)
+        # The extension re-sends the same PDF on reconnect; a known file skips the LLM extraction
+        # Chunked rather than hashlib.file_digest, which needs Python 3.11 (README: 3.10+)
+        digest = hashlib.blake2b()
+        file.stream.seek(0)
+        for chunk in iter(lambda: file.stream.read(65536), b''):
+            digest.update(chunk)
+        upload_key = get_cache_key("resume_upload", digest.hexdigest())
+        profile_data = cache_get(upload_key)
         
-        # Open and extract
-        with open(temp_path, "rb") as f:
-            text = extract_text_from_pdf(f)
+        if profile_data is None:
+            # pypdf reads the upload stream directly, no temp file needed
+            file.stream.seek(0)
+            text = extract_text_from_pdf(file.stream)
+                
+            if not text:
+                 return jsonify({"error": "Could not extract text from PDF"}), 400
+                 
+            # Extract details with AI
+            profile_data = extract_base_resume_info(text)
             
-        if not text:
-             return jsonify({"error": "Could not extract text from PDF"}), 400
-             
-        # Extract details with AI
-        profile_data = extract_base_resume_info(text)
-        
-        if not profile_data or not profile_data.get("name"):
-            return jsonify({"error": "Failed to extract profile data"}), 400
+            if not profile_data or not profile_data.get("name"):
+                return jsonify({"error": "Failed to extract profile data"}), 400
+            cache_set(upload_key, profile_data)
+        else:
+            logger.info("♻️ Same resume PDF as before, reusing extracted profile")
             
         # Save user_profile.json
         profile_path = os.path.join(BASE_DIR, 'user_profile.json')
-        with open(profile_path, "w") as f:
-            json.dump(profile_data, f, indent=4)
-            
-        # Clean up
-        os.remove(temp_path)
+        with open(profile_path, "wb") as f:
+            f.write(orjson.dumps(profile_data, option=orjson.OPT_INDENT_2))
         
         return jsonify({"status": "success", "name": profile_data.get("name")})
         
     except Exception as e:
-        print(f"Error in upload: {e}")
+        logger.exception(f"Error in upload: {e}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    print("🚀 Starting Resume Generator Server on port 8000...")
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    print(f"🚀 Starting Resume Generator Server on port 8000... (logging to {LOG_FILE})")
+    # Connect to the providers in the background so the first /generate skips the handshakes
+    threading.Thread(target=warm_up_providers, daemon=True).start()
+    # threaded: requests are mostly waiting on LLM APIs, so several can be in flight at once
+    app.run(host='0.0.0.0', port=8000, debug=True, threaded=True)